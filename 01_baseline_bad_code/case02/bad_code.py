@@ -2,13 +2,287 @@ import os
 import json
 import datetime
 import random
+import bisect
+import array
+import functools
+import sys
+import io
+import marshal
+import struct
+import zlib
+
+class Ids:
+    def __init__(self, bs=100000):
+        self.bs = bs
+        self.w = len(str(bs - 1))
+        self.pf = 0
+        self.n = bs
+
+    def see(self, i):
+        try:
+            v = int(str(i).split("-")[0])
+        except Exception:
+            return
+        if v >= self.pf:
+            self.pf = v
+            self.n = self.bs
+
+    def _blk(self):
+        t = int(datetime.datetime.now().timestamp() * 1000)
+        if t <= self.pf:
+            t = self.pf + 1
+        self.pf = t
+        self.n = 0
+
+    def next(self):
+        if self.n >= self.bs:
+            self._blk()
+        self.n = self.n + 1
+        return str(self.pf) + "-" + str(self.n - 1).zfill(self.w)
+
+    def allocate(self, k):
+        out = []
+        while k > 0:
+            if self.n >= self.bs:
+                self._blk()
+            c = min(k, self.bs - self.n)
+            pf = str(self.pf) + "-"
+            out.extend([pf + str(j).zfill(self.w) for j in range(self.n, self.n + c)])
+            self.n = self.n + c
+            k = k - c
+        return out
+
+class Row:
+    __slots__ = ("L", "k")
+
+    def __init__(self, L, k):
+        self.L = L
+        self.k = k
+
+    def get(self, key, dv=None):
+        return self.L.cell(self.k, key, dv)
+
+    def __getitem__(self, key):
+        v = self.L.cell(self.k, key, Row)
+        if v is Row:
+            raise KeyError(key)
+        return v
+
+    def __contains__(self, key):
+        return self.L.cell(self.k, key, Row) is not Row
+
+    def keys(self):
+        return self.L.row(self.k).keys()
+
+    def items(self):
+        return self.L.row(self.k).items()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, o):
+        if isinstance(o, Row):
+            o = o.L.row(o.k)
+        return self.L.row(self.k) == o
+
+class Led:
+    def __init__(self, rows=()):
+        self.i = (array.array("q"), array.array("i"), array.array("i"))
+        self.iw = (bytearray(), bytearray(), bytearray())
+        self.a = array.array("q")
+        self.t = array.array("q")
+        self.kc = bytearray()
+        self.n = []
+        self.live = bytearray()
+        self.kinds = ["in", "out"]
+        self.kx = {"in": 0, "out": 1}
+        self.x = {}
+        self.ec = {}
+        self.extend(rows)
+
+    def __len__(self):
+        return len(self.a)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[j] for j in range(*k.indices(len(self.a)))]
+        if k < 0:
+            k = k + len(self.a)
+        if self.live[k] == 0:
+            return None
+        return Row(self, k)
+
+    def __setitem__(self, k, v):
+        if v is not None:
+            raise TypeError("Led rows are append-only")
+        self.live[k] = 0
+        self.a[k] = 0
+        self.x.pop(k, None)
+
+    def __iter__(self):
+        for k in range(len(self.a)):
+            if self.live[k] == 0:
+                yield None
+            else:
+                yield Row(self, k)
+
+    def append(self, e):
+        k = len(self.a)
+        ok = 0
+        try:
+            if list(e.keys()) == ["id", "k", "a", "n", "ts"] and type(e["a"]) is float and type(e["n"]) is str:
+                ok = 1
+        except Exception:
+            ok = 0
+        v = self._sid(e.get("id")) if ok == 1 else None
+        ep = self._sts(e.get("ts")) if v is not None else None
+        ct = self._sct(e["a"]) if ep is not None else None
+        if ct is not None:
+            kk = e["k"]
+            if kk not in self.kx:
+                self.kx[kk] = len(self.kinds)
+                self.kinds.append(kk)
+            for j in range(3):
+                self.i[j].append(v[j][0])
+                self.iw[j].append(v[j][1])
+            self.a.append(ct)
+            self.t.append(ep)
+            self.kc.append(self.kx[kk])
+            self.n.append(sys.intern(e["n"]))
+        else:
+            try:
+                a = int(round(float(e.get("a", 0.0)) * 100))
+                if a.bit_length() > 63:
+                    a = 0
+            except Exception:
+                a = 0
+            for j in range(3):
+                self.i[j].append(0)
+                self.iw[j].append(0)
+            self.a.append(a)
+            self.t.append(0)
+            self.kc.append(0)
+            self.n.append("")
+            self.x[k] = dict(e)
+        self.live.append(1)
+
+    def extend(self, rows):
+        for e in rows:
+            if e is not None:
+                self.append(e)
+
+    def cell(self, k, key, dv=None):
+        if k in self.x:
+            return self.x[k].get(key, dv)
+        if key == "id":
+            w = []
+            for j in range(3):
+                if self.iw[j][k] > 0:
+                    w.append(str(self.i[j][k]).zfill(self.iw[j][k]))
+            return "-".join(w)
+        if key == "k":
+            return self.kinds[self.kc[k]]
+        if key == "a":
+            return self.a[k] / 100.0
+        if key == "n":
+            return self.n[k]
+        if key == "ts":
+            return datetime.datetime.fromtimestamp(self.t[k]).strftime("%Y-%m-%d %H:%M:%S")
+        return dv
+
+    def row(self, k):
+        if k in self.x:
+            return self.x[k]
+        return {"id": self.cell(k, "id"), "k": self.kinds[self.kc[k]], "a": self.a[k] / 100.0, "n": self.n[k], "ts": self.cell(k, "ts")}
+
+    def rows(self):
+        return [self.row(k) for k in range(len(self.a)) if self.live[k] == 1]
+
+    def total(self):
+        return sum(self.a)
+
+    def packed(self):
+        w = Led()
+        w.kinds = list(self.kinds)
+        w.kx = dict(self.kx)
+        w.ec = self.ec
+        for k in range(len(self.a)):
+            if self.live[k] == 0:
+                continue
+            if k in self.x:
+                w.x[len(w.a)] = self.x[k]
+            for j in range(3):
+                w.i[j].append(self.i[j][k])
+                w.iw[j].append(self.iw[j][k])
+            w.a.append(self.a[k])
+            w.t.append(self.t[k])
+            w.kc.append(self.kc[k])
+            w.n.append(self.n[k])
+            w.live.append(1)
+        return w
+
+    def _sid(self, i):
+        if type(i) is not str:
+            return None
+        p = i.split("-")
+        if len(p) < 2 or len(p) > 3:
+            return None
+        w = []
+        for v in p:
+            if not v.isascii() or not v.isdigit() or len(v) > 18:
+                return None
+            if len(w) > 0 and int(v) > 2147483647:
+                return None
+            w.append((int(v), len(v)))
+        if len(w) == 2:
+            w.append((0, 0))
+        return w
+
+    def _sct(self, a):
+        try:
+            ct = int(round(a * 100))
+        except Exception:
+            return None
+        if ct / 100.0 != a or ct.bit_length() > 63:
+            return None
+        return ct
+
+    def _sts(self, ts):
+        if ts in self.ec:
+            return self.ec[ts]
+        try:
+            ep = int(datetime.datetime.strptime(ts, "%Y-%m-%d %H:%M:%S").timestamp())
+            if datetime.datetime.fromtimestamp(ep).strftime("%Y-%m-%d %H:%M:%S") != ts:
+                ep = None
+        except Exception:
+            ep = None
+        if len(self.ec) < 4096:
+            self.ec[ts] = ep
+        return ep
 
 class M:
     def __init__(self):
         self.d = {"t": [], "m": [], "x": []}
-        self.f = {"dirty": 0, "loaded": 0, "last": "", "mode": 0, "panic": 0}
+        self.f = {"dirty": 0, "loaded": 0, "last": "", "mode": 1, "panic": 0}
         self.p = "data_bad_app.json"
+        self.jp = self.p + ".log"
+        self.jmax = 4 * 1024 * 1024
+        self.jb = []
+        self.jd = json.JSONDecoder()
+        self.ix = {"t": {}, "m": {}, "x": {}}
+        self.nh = {"t": 0, "m": 0, "x": 0}
+        self.bc = 0
+        self.cm = 0
+        self.bf = 0
+        self.tk = []
+        self.fw = [0]
+        self.tp = {}
+        self.tst = 0
         self.z = 0
+        self.g = Ids()
         self.a = 1
         self.b = 2
         self.c = 3
@@ -18,35 +292,155 @@ class M:
     def r(self):
         if self.f["loaded"] == 0:
             self.l()
+        for c in ("t", "m", "x"):
+            self._gc(c)
         return self.d
 
     def l(self):
         self.f["loaded"] = 1
         if os.path.exists(self.p):
             try:
-                with open(self.p, "r", encoding="utf-8") as h:
-                    k = h.read()
-                if k.strip() == "":
-                    self.d = {"t": [], "m": [], "x": []}
-                else:
-                    u = json.loads(k)
-                    if isinstance(u, dict):
-                        if "t" in u and "m" in u and "x" in u:
-                            self.d = u
-                        else:
-                            self.d = {"t": [], "m": [], "x": []}
+                with open(self.p, "rb") as h:
+                    if h.read(4) == b"MBIN":
+                        self.bf = 1
+                        u = self._bload(h)
+                    else:
+                        self.bf = 0
+                        h.seek(0)
+                        u = self._sload(io.TextIOWrapper(h, encoding="utf-8"))
+                if isinstance(u, dict):
+                    if "t" in u and "m" in u and "x" in u:
+                        self.d = u
                     else:
                         self.d = {"t": [], "m": [], "x": []}
+                else:
+                    self.d = {"t": [], "m": [], "x": []}
             except Exception:
                 self.d = {"t": [], "m": [], "x": []}
         else:
             self.d = {"t": [], "m": [], "x": []}
+        self._replay()
+        self.jb = []
+        if self.cm == 1:
+            self.d["m"] = Led(self.d["m"])
+        for c in ("t", "m", "x"):
+            self.nh[c] = 0
+            self._reix(c)
+            if len(self.ix[c]) > 0:
+                self.g.see(max(self.ix[c]))
+        self.bc = 0
+        if isinstance(self.d["m"], Led):
+            self.bc = self.d["m"].total()
+        else:
+            for e in self.d["m"]:
+                self.bc = self.bc + self._ct(e.get("a", 0.0))
+        self._tix()
         self.f["last"] = "load"
 
+    def _bload(self, h):
+        v, mv, crc, n = struct.unpack("<BBIQ", h.read(14))
+        if v != 1 or mv > marshal.version:
+            return None
+        b = h.read(n)
+        if len(b) != n or zlib.crc32(b) != crc:
+            return None
+        return marshal.loads(b)
+
+    def _sload(self, h):
+        st = {"h": h, "b": "", "p": 0, "eof": 0}
+        c = self._sws(st)
+        if c == "":
+            return {"t": [], "m": [], "x": []}
+        if c != "{":
+            return None
+        st["p"] = st["p"] + 1
+        u = {}
+        c = self._sws(st)
+        if c == "}":
+            st["p"] = st["p"] + 1
+            c = ""
+        while c != "":
+            if c != '"':
+                return None
+            key = self._sval(st)
+            if self._sws(st) != ":":
+                return None
+            st["p"] = st["p"] + 1
+            if key in ("t", "m", "x") and self._sws(st) == "[":
+                st["p"] = st["p"] + 1
+                w = []
+                c = self._sws(st)
+                if c == "]":
+                    st["p"] = st["p"] + 1
+                else:
+                    while 1:
+                        w.append(self._sval(st))
+                        c = self._sws(st)
+                        st["p"] = st["p"] + 1
+                        if c == "]":
+                            break
+                        if c != ",":
+                            return None
+                u[key] = w
+            else:
+                u[key] = self._sval(st)
+            c = self._sws(st)
+            st["p"] = st["p"] + 1
+            if c == "}":
+                break
+            if c != ",":
+                return None
+            c = self._sws(st)
+        if self._sws(st) != "":
+            return None
+        return u
+
+    def _sfill(self, st):
+        k = st["h"].read(1 << 20)
+        if k == "":
+            st["eof"] = 1
+            return 0
+        st["b"] = st["b"][st["p"]:] + k
+        st["p"] = 0
+        return 1
+
+    def _sws(self, st):
+        while 1:
+            b = st["b"]
+            p = st["p"]
+            while p < len(b) and b[p] in " \t\n\r":
+                p = p + 1
+            st["p"] = p
+            if p < len(b):
+                return b[p]
+            if self._sfill(st) == 0:
+                return ""
+
+    def _sval(self, st):
+        self._sws(st)
+        while 1:
+            try:
+                v, e = self.jd.raw_decode(st["b"], st["p"])
+                if e < len(st["b"]) or st["eof"] == 1:
+                    st["p"] = e
+                    return v
+            except json.JSONDecodeError:
+                if st["eof"] == 1:
+                    raise
+            self._sfill(st)
+
     def sv(self):
         try:
-            with open(self.p, "w", encoding="utf-8") as h:
-                h.write(json.dumps(self.d, ensure_ascii=False, indent=2))
+            if self.f["mode"] == 1 and self._jsize() < self.jmax:
+                if len(self.jb) > 0:
+                    with open(self.jp, "a", encoding="utf-8") as h:
+                        for rec in self.jb:
+                            h.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+                        h.flush()
+                        os.fsync(h.fileno())
+                self.jb = []
+            else:
+                self.pack()
             self.f["dirty"] = 0
             self.f["last"] = "save"
             return 1
@@ -54,6 +448,79 @@ class M:
             self.f["last"] = "save_fail"
             return 0
 
+    def pack(self):
+        for c in ("t", "m", "x"):
+            self._gc(c)
+        tmp = self.p + ".tmp"
+        u = self.d
+        if isinstance(self.d["m"], Led):
+            u = dict(self.d)
+            u["m"] = self.d["m"].rows()
+        if self.bf == 1:
+            b = marshal.dumps(u, 4)
+            with open(tmp, "wb") as h:
+                h.write(b"MBIN" + struct.pack("<BBIQ", 1, 4, zlib.crc32(b), len(b)))
+                h.write(b)
+                h.flush()
+                os.fsync(h.fileno())
+        else:
+            with open(tmp, "w", encoding="utf-8") as h:
+                h.write(json.dumps(u, ensure_ascii=False, indent=2))
+                h.flush()
+                os.fsync(h.fileno())
+        os.replace(tmp, self.p)
+        if os.path.exists(self.jp):
+            os.remove(self.jp)
+        self.jb = []
+
+    def _jsize(self):
+        try:
+            return os.path.getsize(self.jp)
+        except OSError:
+            return 0
+
+    def _j(self, *rec):
+        self.jb.append(list(rec))
+
+    def _replay(self):
+        if not os.path.exists(self.jp):
+            return
+        try:
+            with open(self.jp, "r", encoding="utf-8") as h:
+                lines = h.readlines()
+        except Exception:
+            return
+        if len(lines) == 0:
+            return
+        w = {}
+        for c in ("t", "m", "x"):
+            w[c] = {}
+            for e in self.d[c]:
+                w[c][str(e.get("id"))] = e
+        for ln in lines:
+            try:
+                rec = json.loads(ln)
+            except Exception:
+                break
+            op = rec[0]
+            c = rec[1]
+            if c not in w:
+                continue
+            if op == "+":
+                w[c][str(rec[2].get("id"))] = rec[2]
+            elif op == "*":
+                for e in rec[2]:
+                    w[c][str(e.get("id"))] = e
+            elif op == "-":
+                w[c].pop(str(rec[2]), None)
+            elif op == "~":
+                e = w[c].get(str(rec[2]))
+                if e is not None:
+                    e["done"] = rec[3]
+                    e["ts2"] = rec[4]
+        for c in ("t", "m", "x"):
+            self.d[c] = list(w[c].values())
+
     def addt(self, txt, pr):
         if txt is None:
             txt = ""
@@ -64,36 +531,48 @@ class M:
         if pr > 9:
             pr = 9
         o = {"id": self._id(), "txt": str(txt), "pr": int(pr), "done": 0, "ts": self._ts()}
+        self.ix["t"][o["id"]] = len(self.d["t"])
         self.d["t"].append(o)
+        self._j("+", "t", o)
         self.f["dirty"] = 1
         self.f["last"] = "addt"
         return o["id"]
 
+    def addt_many(self, rows):
+        w = []
+        for txt, pr in rows:
+            if txt is None:
+                txt = ""
+            if pr is None:
+                pr = 0
+            if pr < 0:
+                pr = 0
+            if pr > 9:
+                pr = 9
+            w.append({"id": "", "txt": str(txt), "pr": int(pr), "done": 0, "ts": ""})
+        return self._many("t", w, "addt")
+
     def donet(self, i):
         ok = 0
-        for e in self.d["t"]:
-            if str(e.get("id")) == str(i):
-                if e.get("done") == 0:
-                    e["done"] = 1
-                else:
-                    e["done"] = 0
-                e["ts2"] = self._ts()
-                ok = 1
+        k = self.ix["t"].get(str(i))
+        if k is not None:
+            e = self.d["t"][k]
+            if e.get("done") == 0:
+                e["done"] = 1
+            else:
+                e["done"] = 0
+            e["ts2"] = self._ts()
+            self._j("~", "t", e.get("id"), e["done"], e["ts2"])
+            ok = 1
         if ok == 1:
             self.f["dirty"] = 1
         self.f["last"] = "donet"
         return ok
 
     def delt(self, i):
-        n = []
-        ok = 0
-        for e in self.d["t"]:
-            if str(e.get("id")) == str(i):
-                ok = 1
-            else:
-                n.append(e)
-        self.d["t"] = n
+        ok = self._del("t", i)
         if ok == 1:
+            self._j("-", "t", str(i))
             self.f["dirty"] = 1
         self.f["last"] = "delt"
         return ok
@@ -114,87 +593,304 @@ class M:
             a = -a
         if kind == "out":
             a = -a
+        a = self._ct(a) / 100.0
         o = {"id": self._id(), "k": kind, "a": a, "n": str(note) if note is not None else "", "ts": self._ts()}
+        self.ix["m"][o["id"]] = len(self.d["m"])
         self.d["m"].append(o)
+        self.bc = self.bc + self._ct(a)
+        self._tadd(o["id"], self._ep(o["ts"]), self._ct(a))
+        self._j("+", "m", o)
         self.f["dirty"] = 1
         self.f["last"] = "addm"
         return o["id"]
 
+    def addm_many(self, rows):
+        w = []
+        s = 0
+        for kind, amount, note in rows:
+            if kind not in ["in", "out"]:
+                if kind == "i":
+                    kind = "in"
+                else:
+                    kind = "out"
+            try:
+                a = float(amount)
+            except Exception:
+                a = 0.0
+            if a < 0:
+                a = -a
+            if kind == "out":
+                a = -a
+            ct = self._ct(a)
+            a = ct / 100.0
+            s = s + ct
+            w.append({"id": "", "k": kind, "a": a, "n": str(note) if note is not None else "", "ts": ""})
+        out = self._many("m", w, "addm")
+        if len(out) > 0:
+            self.bc = self.bc + s
+            self.tst = 1
+        return out
+
     def delm(self, i):
-        n = []
-        ok = 0
-        for e in self.d["m"]:
-            if str(e.get("id")) == str(i):
-                ok = 1
-            else:
-                n.append(e)
-        self.d["m"] = n
+        k = self.ix["m"].get(str(i))
+        if k is not None:
+            self.bc = self.bc - self._ct(self.d["m"][k].get("a", 0.0))
+            self._tdel(i, self._ct(self.d["m"][k].get("a", 0.0)))
+        ok = self._del("m", i)
         if ok == 1:
+            self._j("-", "m", str(i))
             self.f["dirty"] = 1
         self.f["last"] = "delm"
         return ok
 
     def bal(self):
-        s = 0.0
-        for e in self.d["m"]:
-            try:
-                s += float(e.get("a", 0.0))
-            except Exception:
-                s += 0.0
+        return self.bc / 100.0
+
+    def bal_at(self, x):
+        if self.tst == 1:
+            self._tix()
+        n = bisect.bisect_right(self.tk, self._ep(x, 1))
+        return self._fsum(n) / 100.0
+
+    def flow(self, x, y):
+        if self.tst == 1:
+            self._tix()
+        lo = bisect.bisect_left(self.tk, self._ep(x))
+        hi = bisect.bisect_right(self.tk, self._ep(y, 1))
+        if hi <= lo:
+            return 0.0
+        return (self._fsum(hi) - self._fsum(lo)) / 100.0
+
+    def _tix(self):
+        w = []
+        c = {}
+        L = self.d["m"]
+        if isinstance(L, Led):
+            for k in range(len(L)):
+                if L.live[k] == 0:
+                    continue
+                if k in L.x:
+                    ep = self._ep(L.x[k].get("ts", ""))
+                else:
+                    ep = L.t[k]
+                w.append((ep, L.a[k], L.cell(k, "id")))
+        else:
+            for e in L:
+                if e is None:
+                    continue
+                ts = e.get("ts", "")
+                if ts not in c:
+                    c[ts] = self._ep(ts)
+                w.append((c[ts], self._ct(e.get("a", 0.0)), str(e.get("id"))))
+        w.sort(key=lambda v: v[0])
+        self.tk = []
+        self.fw = [0] * (len(w) + 1)
+        self.tp = {}
+        k = 0
+        for v in w:
+            k = k + 1
+            self.tk.append(v[0])
+            self.fw[k] = self.fw[k] + v[1]
+            self.tp[v[2]] = k
+            j = k + (k & -k)
+            if j <= len(w):
+                self.fw[j] = self.fw[j] + self.fw[k]
+        self.tst = 0
+
+    def _tadd(self, i, ep, ct):
+        if self.tst == 1:
+            return
+        if len(self.tk) > 0 and ep < self.tk[-1]:
+            self.tst = 1
+            return
+        k = len(self.tk) + 1
+        self.fw.append(ct + self._fsum(k - 1) - self._fsum(k - (k & -k)))
+        self.tk.append(ep)
+        self.tp[str(i)] = k
+
+    def _tdel(self, i, ct):
+        k = self.tp.pop(str(i), None)
+        if k is None or self.tst == 1:
+            return
+        while k < len(self.fw):
+            self.fw[k] = self.fw[k] - ct
+            k = k + (k & -k)
+
+    def _fsum(self, k):
+        s = 0
+        while k > 0:
+            s = s + self.fw[k]
+            k = k - (k & -k)
         return s
 
+    def _ep(self, x, end=0):
+        if isinstance(x, datetime.datetime):
+            return int(x.timestamp())
+        if isinstance(x, datetime.date):
+            x = x.isoformat()
+        x = str(x).strip()
+        try:
+            if len(x) == 10:
+                v = datetime.datetime.strptime(x, "%Y-%m-%d")
+                if end == 1:
+                    return int(v.timestamp()) + 86399
+                return int(v.timestamp())
+            return int(datetime.datetime.strptime(x, "%Y-%m-%d %H:%M:%S").timestamp())
+        except Exception:
+            return 0
+
+    def _ct(self, a):
+        try:
+            return int(round(float(a) * 100))
+        except Exception:
+            return 0
+
     def addx(self, tag, text):
         if tag is None:
             tag = ""
         if text is None:
             text = ""
         o = {"id": self._id(), "tag": str(tag), "txt": str(text), "ts": self._ts(), "k": self._weirdk(tag)}
+        self.ix["x"][o["id"]] = len(self.d["x"])
         self.d["x"].append(o)
+        self._j("+", "x", o)
         self.f["dirty"] = 1
         self.f["last"] = "addx"
         return o["id"]
 
+    def addx_many(self, rows):
+        w = []
+        for tag, text in rows:
+            if tag is None:
+                tag = ""
+            if text is None:
+                text = ""
+            w.append({"id": "", "tag": str(tag), "txt": str(text), "ts": "", "k": _wk(str(tag))})
+        return self._many("x", w, "addx")
+
+    def _many(self, c, w, op):
+        if len(w) == 0:
+            return []
+        ids = self.g.allocate(len(w))
+        ts = self._ts()
+        n = len(self.d[c])
+        for k in range(len(w)):
+            w[k]["id"] = ids[k]
+            w[k]["ts"] = ts
+        self.d[c].extend(w)
+        self.ix[c].update(zip(ids, range(n, n + len(w))))
+        self._j("*", c, w)
+        self.f["dirty"] = 1
+        self.f["last"] = op
+        return ids
+
     def delx(self, i):
-        n = []
-        ok = 0
-        for e in self.d["x"]:
-            if str(e.get("id")) == str(i):
-                ok = 1
-            else:
-                n.append(e)
-        self.d["x"] = n
+        ok = self._del("x", i)
         if ok == 1:
+            self._j("-", "x", str(i))
             self.f["dirty"] = 1
         self.f["last"] = "delx"
         return ok
 
+    def _del(self, c, i):
+        k = self.ix[c].pop(str(i), None)
+        if k is None:
+            return 0
+        self.d[c][k] = None
+        self.nh[c] = self.nh[c] + 1
+        if self.nh[c] > 64 and self.nh[c] * 2 > len(self.d[c]):
+            self._gc(c)
+        return 1
+
+    def columnar(self, on=1):
+        self.r()
+        self.cm = on
+        if on == 1 and not isinstance(self.d["m"], Led):
+            self.d["m"] = Led(self.d["m"])
+        elif on == 0 and isinstance(self.d["m"], Led):
+            self.d["m"] = self.d["m"].rows()
+        self._reix("m")
+        self.tst = 1
+
+    def _gc(self, c):
+        if self.nh[c] == 0:
+            return
+        if isinstance(self.d[c], Led):
+            self.d[c] = self.d[c].packed()
+        else:
+            self.d[c] = [e for e in self.d[c] if e is not None]
+        self.nh[c] = 0
+        self._reix(c)
+
+    def _reix(self, c):
+        w = {}
+        k = 0
+        for e in self.d[c]:
+            w[str(e.get("id"))] = k
+            k = k + 1
+        self.ix[c] = w
+
     def _ts(self):
         return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     def _id(self):
-        self.z = self.z + 1
-        return str(int(datetime.datetime.now().timestamp() * 1000)) + "-" + str(self.z) + "-" + str(random.randint(10, 99))
+        return self.g.next()
 
     def _weirdk(self, t):
-        v = 0
-        x = str(t)
-        for ch in x:
-            v = v + ord(ch)
-            if v % 2 == 0:
-                v = v + 7
-            else:
-                v = v - 3
-            if v < 0:
-                v = -v + 5
-        if len(x) == 0:
-            v = 13
-        if v % 5 == 0:
-            v = v + 111
-        elif v % 3 == 0:
-            v = v + 222
+        return _wk(str(t))
+
+    def rekey_notes(self):
+        n = 0
+        for e in self.d["x"]:
+            if e is None:
+                continue
+            k = _wk(str(e.get("tag", "")))
+            if e.get("k") != k:
+                e["k"] = k
+                self._j("+", "x", e)
+                n = n + 1
+        if n > 0:
+            self.f["dirty"] = 1
+        self.f["last"] = "rekey"
+        return n
+
+@functools.lru_cache(maxsize=4096)
+def _wk(x):
+    v = 0
+    for ch in x:
+        v = v + ord(ch)
+        if v % 2 == 0:
+            v = v + 7
         else:
-            v = v + 333
-        return v
+            v = v - 3
+        if v < 0:
+            v = -v + 5
+    if len(x) == 0:
+        v = 13
+    if v % 5 == 0:
+        v = v + 111
+    elif v % 3 == 0:
+        v = v + 222
+    else:
+        v = v + 333
+    return v
+
+PG = 50
+
+def _conv(src, dst, bf=None):
+    mm = M()
+    mm.p = src
+    mm.jp = src + ".log"
+    mm.l()
+    mm.p = dst
+    mm.jp = dst + ".log"
+    if bf is None:
+        if dst.endswith(".bin"):
+            bf = 1
+        else:
+            bf = 0
+    mm.bf = bf
+    mm.pack()
 
 def _inp(p):
     try:
@@ -249,32 +945,62 @@ def _menu4():
     print("--------------")
     print("")
 
-def _show_tasks(mm):
+def _page(rows, fmt, off, n):
+    i = off
+    w = []
+    for k in range(off, min(off + n, len(rows))):
+        i = i + 1
+        w.append(fmt(i, rows[k]))
+    if len(w) > 0:
+        sys.stdout.write("\n".join(w) + "\n")
+        sys.stdout.flush()
+    return i
+
+def _rng(rows):
+    if len(rows) <= PG:
+        return 0, len(rows)
+    v = _inp("Ab Nr. (Enter=1, -N=letzte N): ").strip()
+    try:
+        k = int(v)
+    except Exception:
+        k = 1
+    if k < 0:
+        return max(0, len(rows) + k), -k
+    if k < 1:
+        k = 1
+    return k - 1, len(rows)
+
+def _list(rows, fmt, off, n):
+    end = min(len(rows), off + n)
+    while off < end:
+        off = _page(rows, fmt, off, min(PG, end - off))
+        if off < end:
+            v = _inp("-- " + str(off) + "/" + str(end) + " (Enter=weiter, q=Ende) -- ").strip().lower()
+            if v == "q":
+                break
+
+def _fmt_task(i, e):
+    s = " "
+    if e.get("done") == 1:
+        s = "X"
+    pr = e.get("pr", 0)
+    if pr >= 7:
+        f = "!!!"
+    elif pr >= 4:
+        f = "!!"
+    else:
+        f = "!"
+    return "%d) [%s] %s pr=%s id=%s :: %s (%s)" % (i, s, f, pr, e.get("id", ""), e.get("txt", ""), e.get("ts", ""))
+
+def _show_tasks(mm, off=None, n=None):
     d = mm.r()
     t = d.get("t", [])
     if len(t) == 0:
         print("Keine Aufgaben.")
     else:
-        i = 0
-        for e in t:
-            i = i + 1
-            s = " "
-            if e.get("done") == 1:
-                s = "X"
-            pr = e.get("pr", 0)
-            txt = e.get("txt", "")
-            eid = e.get("id", "")
-            ts = e.get("ts", "")
-            if pr >= 7:
-                f = "!!!"
-            elif pr >= 4:
-                f = "!!"
-            else:
-                f = "!"
-            if i % 2 == 0:
-                print(str(i) + ") [" + s + "] " + f + " pr=" + str(pr) + " id=" + str(eid) + " :: " + str(txt) + " (" + str(ts) + ")")
-            else:
-                print(str(i) + ") [" + s + "] " + f + " pr=" + str(pr) + " id=" + str(eid) + " :: " + str(txt) + " (" + str(ts) + ")")
+        if off is None:
+            off, n = _rng(t)
+        _list(t, _fmt_task, off, n if n is not None else len(t))
     if len(t) > 0 and len(t) % 7 == 0:
         print("Viele Aufgaben heute...")
 
@@ -314,36 +1040,36 @@ def _del_task(mm):
     else:
         print("Nicht gefunden.")
 
-def _show_money(mm):
+def _fmt_money(j, e):
+    k = e.get("k", "")
+    a = e.get("a", 0.0)
+    if a < 0:
+        sign = "-"
+    else:
+        sign = "+"
+    if k == "in":
+        label = "EIN"
+    elif k == "out":
+        label = "AUS"
+    else:
+        label = "???"
+    if abs(float(a)) > 9999:
+        f = "!!!"
+    elif abs(float(a)) > 99:
+        f = "!!"
+    else:
+        f = "!"
+    return "%d) [%s] id=%s %s%s %s %s (%s)" % (j, label, e.get("id", ""), sign, abs(float(a)), f, e.get("n", ""), e.get("ts", ""))
+
+def _show_money(mm, off=None, n=None):
     d = mm.r()
     m = d.get("m", [])
     if len(m) == 0:
         print("Keine Buchungen.")
     else:
-        j = 0
-        for e in m:
-            j = j + 1
-            eid = e.get("id", "")
-            k = e.get("k", "")
-            a = e.get("a", 0.0)
-            n = e.get("n", "")
-            ts = e.get("ts", "")
-            if a < 0:
-                sign = "-"
-            else:
-                sign = "+"
-            if k == "in":
-                label = "EIN"
-            elif k == "out":
-                label = "AUS"
-            else:
-                label = "???"
-            if abs(float(a)) > 9999:
-                print(str(j) + ") [" + label + "] id=" + str(eid) + " " + sign + str(abs(float(a))) + " !!! " + str(n) + " (" + str(ts) + ")")
-            elif abs(float(a)) > 99:
-                print(str(j) + ") [" + label + "] id=" + str(eid) + " " + sign + str(abs(float(a))) + " !! " + str(n) + " (" + str(ts) + ")")
-            else:
-                print(str(j) + ") [" + label + "] id=" + str(eid) + " " + sign + str(abs(float(a))) + " ! " + str(n) + " (" + str(ts) + ")")
+        if off is None:
+            off, n = _rng(m)
+        _list(m, _fmt_money, off, n if n is not None else len(m))
 
 def _add_money_in(mm):
     a = _inp("Betrag: ")
@@ -382,30 +1108,29 @@ def _bal(mm):
     if abs(b) > 100000:
         print("Auffällig groß.")
 
-def _show_notes(mm):
+def _fmt_note(k, e):
+    tag = e.get("tag", "")
+    txt = e.get("txt", "")
+    wk = e.get("k", 0)
+    if wk % 2 == 0:
+        p = "EVEN"
+    else:
+        p = "ODD"
+    if len(tag) == 0:
+        tag = "none"
+    if len(txt) > 60:
+        txt = txt[:60] + "..."
+    return "%d) id=%s [%s] %s k=%s :: %s (%s)" % (k, e.get("id", ""), tag, p, wk, txt, e.get("ts", ""))
+
+def _show_notes(mm, off=None, n=None):
     d = mm.r()
     x = d.get("x", [])
     if len(x) == 0:
         print("Keine Notizen.")
     else:
-        k = 0
-        for e in x:
-            k = k + 1
-            eid = e.get("id", "")
-            tag = e.get("tag", "")
-            txt = e.get("txt", "")
-            ts = e.get("ts", "")
-            wk = e.get("k", 0)
-            if wk % 2 == 0:
-                p = "EVEN"
-            else:
-                p = "ODD"
-            if len(tag) == 0:
-                tag = "none"
-            if len(txt) > 60:
-                print(str(k) + ") id=" + str(eid) + " [" + str(tag) + "] " + p + " k=" + str(wk) + " :: " + str(txt[:60]) + "... (" + str(ts) + ")")
-            else:
-                print(str(k) + ") id=" + str(eid) + " [" + str(tag) + "] " + p + " k=" + str(wk) + " :: " + str(txt) + " (" + str(ts) + ")")
+        if off is None:
+            off, n = _rng(x)
+        _list(x, _fmt_note, off, n if n is not None else len(x))
         if len(x) % 4 == 0:
             print("Runde Zahl an Notizen.")
 
@@ -506,6 +1231,26 @@ def _notes_loop(mm):
                 print("Ungültig.")
 
 def main():
+    global PG
+    if "--page-size" in sys.argv:
+        try:
+            PG = max(1, int(sys.argv[sys.argv.index("--page-size") + 1]))
+        except Exception:
+            PG = 50
+    if "--convert" in sys.argv:
+        k = sys.argv.index("--convert")
+        w = [v for v in sys.argv[k + 1:k + 3] if not v.startswith("--")]
+        if len(w) < 2:
+            print("Aufruf: --convert QUELLE ZIEL [--bin|--json]")
+            return
+        bf = None
+        if "--bin" in sys.argv:
+            bf = 1
+        elif "--json" in sys.argv:
+            bf = 0
+        _conv(w[0], w[1], bf)
+        print("Konvertiert:", w[1])
+        return
     mm = M()
     mm.l()
     run = 1
@@ -3,6 +3,178 @@ import json
 import time
 import random
 import math
+import heapq
+import csv
+import datetime
+
+MOODS = {"bad": -10, "meh": -2, "ok": 1, "good": 5, "great": 9, "focus": 7, "tired": -4, "angry": -6}
+
+class Ids:
+    def __init__(self, bs=100000):
+        self.bs = bs
+        self.w = len(str(bs - 1))
+        self.pf = 0
+        self.n = bs
+
+    def see(self, i):
+        try:
+            v = int(str(i).split("-")[0])
+        except Exception:
+            return
+        if v >= self.pf:
+            self.pf = v
+            self.n = self.bs
+
+    def _blk(self):
+        t = int(time.time() * 1000)
+        if t <= self.pf:
+            t = self.pf + 1
+        self.pf = t
+        self.n = 0
+
+    def next(self):
+        if self.n >= self.bs:
+            self._blk()
+        self.n = self.n + 1
+        return str(self.pf) + "-" + str(self.n - 1).zfill(self.w)
+
+    def allocate(self, k):
+        out = []
+        while k > 0:
+            if self.n >= self.bs:
+                self._blk()
+            c = min(k, self.bs - self.n)
+            pf = str(self.pf) + "-"
+            out.extend([pf + str(j).zfill(self.w) for j in range(self.n, self.n + c)])
+            self.n = self.n + c
+            k = k - c
+        return out
+
+class Cfg:
+    def __init__(self, dv):
+        self.dv = dv
+        self.v = 0
+        self.load({})
+
+    def load(self, raw):
+        if not isinstance(raw, dict):
+            raw = {}
+        for k, x in self.dv.items():
+            setattr(self, k, self._co(raw.get(k, x), x))
+        self.v = self.v + 1
+
+    def set(self, raw, k, x):
+        raw[k] = x
+        setattr(self, k, self._co(x, self.dv[k]))
+        self.v = self.v + 1
+
+    def _co(self, x, dv):
+        try:
+            return int(x)
+        except Exception:
+            return dv
+
+class Sc:
+    def __init__(self, lvl, w, cap, v=0):
+        self.v = v
+        self.lvl = lvl
+        self.w = w
+        self.cap = cap
+        if lvl <= 0:
+            lvl = 1
+        if lvl == 1:
+            c, d = 1.0, 0.0
+        elif lvl == 2:
+            c, d = 1.2, 0.01
+        elif lvl == 3:
+            c, d = 1.5, 0.02
+        elif lvl == 4:
+            c, d = 1.9, 0.03
+        else:
+            c, d = 0.9, 0.005
+        self.mo = {}
+        for k, v in MOODS.items():
+            self.mo[k] = 0.0 + v
+        self.rc = {}
+        self.tb = [0.0] * 5001
+        self.tl = [0.0] * 5001
+        self.tm = None
+        if lvl != 1:
+            self.tm = [0.0] * 5001
+        for m in range(1, 5001):
+            if m > 180:
+                self.tb[m] = 4
+            elif m > 90:
+                self.tb[m] = 2
+            elif m > 30:
+                self.tb[m] = 1
+            else:
+                self.tb[m] = -0.5
+            if lvl == 1:
+                self.tl[m] = math.log(m + 1)
+            else:
+                self.tl[m] = math.log(m + 1) * c
+                self.tm[m] = m * d
+
+    def score(self, minutes, mood, note, userobj):
+        m = minutes
+        if m < 1:
+            m = 1
+        if m > 5000:
+            m = 5000
+        base = self.mo.get(mood, 0.0)
+        n = len(note)
+        if n > 40:
+            base += 2
+        elif n > 10:
+            base += 1
+        if userobj is not None:
+            nm = len(str(userobj.get("name", "")))
+            if nm % 2 == 0:
+                base += 0.7
+            else:
+                base -= 0.3
+            if nm > 8:
+                base += 0.9
+        base += self.tb[m]
+        if self.tm is None:
+            base = base + self.tl[m]
+        else:
+            base = base + self.tl[m] + self.tm[m]
+        w = self.w
+        if w == 1:
+            t = int(time.time())
+            if t % 2 == 0:
+                base += 0.11
+            else:
+                base -= 0.07
+            if t % 5 == 0:
+                base += 0.33
+        elif w == 2:
+            r = random.randint(1, 10)
+            if r > 7:
+                base += 0.5
+            elif r > 4:
+                base += 0.1
+            else:
+                base -= 0.2
+        else:
+            if (m + n) % 3 == 0:
+                base += 0.06
+            else:
+                base -= 0.02
+        r = self.rc.get(base)
+        if r is None:
+            if len(self.rc) > 200000:
+                self.rc = {}
+            x = base
+            if x > 9999:
+                x = 9999
+            if x < -9999:
+                x = -9999
+            r = round(x, 3)
+            self.rc[base] = r
+        return r
 
 class Z:
     def __init__(self):
@@ -15,6 +187,22 @@ class Z:
         self.bb = 42
         self.cc = 101
         self.cache = {}
+        self.g = Ids()
+        self.ui = {}
+        self.un = {}
+        self.si = {}
+        self.us = {}
+        self.nh = 0
+        self.ag = {}
+        self.sq = 0
+        self.lb = {"m": [], "avg": [], "n": [], "best": []}
+        self.lv = 0
+        self.rb = {"d": {}, "w": {}}
+        self.ub = {}
+        self.rz = 0
+        self.wk = {}
+        self.cf = Cfg({"lvl": 2, "weird": 1, "cap": 999})
+        self.en = None
 
     def load(self):
         self.st["loaded"] = 1
@@ -37,10 +225,19 @@ class Z:
                 self.db = {"u": [], "s": [], "cfg": {"lvl": 2, "weird": 1, "cap": 999}}
         else:
             self.db = {"u": [], "s": [], "cfg": {"lvl": 2, "weird": 1, "cap": 999}}
+        for c in ("u", "s"):
+            if len(self.db[c]) > 0:
+                self.g.see(max(str(e.get("id")) for e in self.db[c]))
+        self.cf.load(self.db["cfg"])
+        self._uix()
+        self.nh = 0
+        self._six()
+        self._agall()
         self.st["last"] = "load"
         return 1
 
     def save(self):
+        self._gc()
         try:
             with open(self.p, "w", encoding="utf-8") as f:
                 f.write(json.dumps(self.db, ensure_ascii=False, indent=2))
@@ -52,29 +249,19 @@ class Z:
             return 0
 
     def _id(self):
-        self.k = self.k + 1
-        return str(int(time.time() * 1000)) + "-" + str(self.k) + "-" + str(random.randint(100, 999))
+        return self.g.next()
 
     def _ts(self):
         return time.strftime("%Y-%m-%d %H:%M:%S")
 
     def _lvl(self):
-        try:
-            return int(self.db.get("cfg", {}).get("lvl", 2))
-        except Exception:
-            return 2
+        return self.cf.lvl
 
     def _weird(self):
-        try:
-            return int(self.db.get("cfg", {}).get("weird", 1))
-        except Exception:
-            return 1
+        return self.cf.weird
 
     def _cap(self):
-        try:
-            return int(self.db.get("cfg", {}).get("cap", 999))
-        except Exception:
-            return 999
+        return self.cf.cap
 
     def add_user(self, name):
         if name is None:
@@ -82,11 +269,7 @@ class Z:
         n = str(name).strip()
         if n == "":
             n = "u" + str(random.randint(1, 999))
-        exists = 0
-        for u in self.db["u"]:
-            if u.get("name") == n:
-                exists = 1
-        if exists == 1:
+        if n in self.un:
             return 0
         o = {"id": self._id(), "name": n, "ts": self._ts(), "a": 0, "b": 0, "c": 0}
         if len(n) % 2 == 0:
@@ -96,31 +279,48 @@ class Z:
         if len(n) > 8:
             o["c"] = 1
         self.db["u"].append(o)
+        self.ui[o["id"]] = o
+        self.un[n] = o
         self.st["dirty"] = 1
         self.st["last"] = "add_user"
         return o["id"]
 
     def del_user(self, uid_or_name):
         ok = 0
-        nn = []
-        for u in self.db["u"]:
-            if str(u.get("id")) == str(uid_or_name) or str(u.get("name")) == str(uid_or_name):
-                ok = 1
-            else:
-                nn.append(u)
-        self.db["u"] = nn
-        if ok == 1:
-            ss = []
-            for s in self.db["s"]:
-                if str(s.get("u")) == str(uid_or_name) or str(s.get("un")) == str(uid_or_name):
-                    pass
-                else:
-                    ss.append(s)
-            self.db["s"] = ss
-            self.st["dirty"] = 1
+        if self.del_users([uid_or_name]) > 0:
+            ok = 1
         self.st["last"] = "del_user"
         return ok
 
+    def del_users(self, keys):
+        ks = set()
+        for x in keys:
+            k = str(x)
+            if k in self.ui or k in self.un:
+                ks.add(k)
+        n = 0
+        if len(ks) > 0:
+            nn = []
+            for u in self.db["u"]:
+                if str(u.get("id")) in ks or str(u.get("name")) in ks:
+                    n += 1
+                    self.ag.pop(str(u.get("id")), None)
+                    for k in self.us.pop(str(u.get("id")), []):
+                        s = self.db["s"][k]
+                        if s is not None:
+                            self.si.pop(str(s.get("id")), None)
+                            self._rb(s, -1)
+                            self._sdel(k)
+                    self.ub.pop(str(u.get("id")), None)
+                else:
+                    nn.append(u)
+            self.db["u"] = nn
+            self._gc(64)
+            self._uix()
+            self.st["dirty"] = 1
+        self.st["last"] = "del_users"
+        return n
+
     def list_users(self):
         return self.db.get("u", [])
 
@@ -132,51 +332,190 @@ class Z:
             m = int(minutes)
         except Exception:
             m = 0
+        e = self._eng()
+        m, mo, nt = self._norm(m, mood, note, e.cap)
+        sid = self._id()
+        score = e.score(m, mo, nt, u)
+        o = {"id": sid, "u": u.get("id"), "un": u.get("name"), "m": m, "mood": mo, "note": nt, "score": score, "ts": self._ts()}
+        k = len(self.db["s"])
+        self.db["s"].append(o)
+        self.si[sid] = k
+        self.us.setdefault(str(u.get("id")), []).append(k)
+        self._agadd(o)
+        self._lbpush(str(u.get("id")))
+        self._rb(o, 1)
+        self.st["dirty"] = 1
+        self.st["last"] = "add_session"
+        return sid
+
+    def _norm(self, m, mood, note, cap):
         if m < 0:
             m = -m
         if m == 0:
             m = 5
-        if m > self._cap():
-            m = self._cap()
+        if m > cap:
+            m = cap
         mo = str(mood).strip() if mood is not None else ""
         if mo == "":
             mo = "ok"
-        if mo not in ["bad", "ok", "good", "great", "meh", "angry", "tired", "focus"]:
+        if mo not in MOODS:
             if len(mo) > 6:
                 mo = "meh"
             else:
                 mo = "ok"
         nt = str(note) if note is not None else ""
-        sid = self._id()
-        score = self._calc_score(m, mo, nt, u)
-        o = {"id": sid, "u": u.get("id"), "un": u.get("name"), "m": m, "mood": mo, "note": nt, "score": score, "ts": self._ts()}
-        self.db["s"].append(o)
+        return m, mo, nt
+
+    def import_sessions(self, path, bs=20000):
+        rp = {"ok": 0, "rej": 0, "bad": []}
+        try:
+            f = open(path, "r", encoding="utf-8", newline="")
+        except Exception:
+            self._rej(rp, 0, "open")
+            return rp
+        with f:
+            if path.lower().endswith((".jsonl", ".ndjson")):
+                rr = self._rjsonl(f, rp)
+            else:
+                rr = self._rcsv(f, rp)
+            w = []
+            for r in rr:
+                w.append(r)
+                if len(w) >= bs:
+                    rp["ok"] += self._imp(w, rp)
+                    w = []
+            if len(w) > 0:
+                rp["ok"] += self._imp(w, rp)
+        rp["bad"].sort(key=lambda v: v[0])
+        self.st["last"] = "import_sessions"
+        return rp
+
+    def _rcsv(self, f, rp):
+        a, b, c, d = 0, 1, 2, 3
+        rd = csv.reader(f)
+        for r in rd:
+            n = len(r)
+            if n == 0:
+                continue
+            if rd.line_num == 1 and r[0].strip().lower() in ("user", "un", "u", "name"):
+                hh = [x.strip().lower() for x in r]
+                a, b, c, d = self._col(hh, ("user", "un", "u", "name")), self._col(hh, ("minutes", "m")), self._col(hh, ("mood",)), self._col(hh, ("note",))
+                continue
+            if a < 0 or b < 0 or a >= n or b >= n:
+                self._rej(rp, rd.line_num, "parse")
+                continue
+            yield (rd.line_num, r[a].strip(), r[b], r[c] if 0 <= c < n else None, r[d] if 0 <= d < n else None)
+
+    def _col(self, hh, nn):
+        for n in nn:
+            if n in hh:
+                return hh.index(n)
+        return -1
+
+    def _rjsonl(self, f, rp):
+        ln = 0
+        for t in f:
+            ln += 1
+            if t.strip() == "":
+                continue
+            try:
+                x = json.loads(t)
+            except Exception:
+                x = None
+            if not isinstance(x, dict):
+                self._rej(rp, ln, "parse")
+                continue
+            uk = x.get("user", x.get("un", x.get("u")))
+            if uk is None or isinstance(uk, (list, dict)):
+                self._rej(rp, ln, "user")
+                continue
+            yield (ln, str(uk), x.get("minutes", x.get("m")), x.get("mood"), x.get("note"))
+
+    def _rej(self, rp, ln, why):
+        rp["rej"] += 1
+        if len(rp["bad"]) < 1000:
+            rp["bad"].append((ln, why))
+
+    def _imp(self, w, rp):
+        e = self._eng()
+        f = e.score
+        ts = self._ts()
+        fu = {}
+        out = []
+        cc = []
+        for ln, uk, mi, mood, note in w:
+            c = fu.get(uk)
+            if c is None:
+                u = self._find_user(uk)
+                if u is None:
+                    self._rej(rp, ln, "user")
+                    continue
+                c = (u, u.get("id"), u.get("name"), str(u.get("id")))
+                fu[uk] = c
+            try:
+                m = int(mi)
+            except Exception:
+                self._rej(rp, ln, "minutes")
+                continue
+            m, mo, nt = self._norm(m, mood, note, e.cap)
+            out.append({"id": "", "u": c[1], "un": c[2], "m": m, "mood": mo, "note": nt, "score": f(m, mo, nt, c[0]), "ts": ts})
+            cc.append(c[3])
+        if len(out) == 0:
+            return 0
+        ids = self.g.allocate(len(out))
+        k = len(self.db["s"])
+        gg = {}
+        for j in range(len(out)):
+            o = out[j]
+            i = ids[j]
+            o["id"] = i
+            self.si[i] = k
+            t = gg.get(cc[j])
+            if t is None:
+                t = (self.us.setdefault(cc[j], []), self._agn(cc[j]), [0, 0, 0.0])
+                gg[cc[j]] = t
+            t[0].append(k)
+            a = t[1]
+            x = o["score"]
+            t[2][0] += 1
+            t[2][1] += o["m"]
+            t[2][2] += x
+            a["m"] += o["m"]
+            a["sc"] += x
+            a["n"] += 1
+            self.sq = self.sq + 1
+            if a["hz"] == 0:
+                heapq.heappush(a["hb"], (-x, self.sq, i))
+                heapq.heappush(a["hw"], (x, self.sq, i))
+            else:
+                a["hb"].append((-x, self.sq, i))
+                a["hw"].append((x, self.sq, i))
+            k = k + 1
+        self.db["s"].extend(out)
+        for x, t in gg.items():
+            self._lbpush(x)
+            self._rbn(x, ts, t[2][0], t[2][1], t[2][2])
         self.st["dirty"] = 1
-        self.st["last"] = "add_session"
-        return sid
+        return len(out)
 
     def list_sessions(self, user_key=None):
         if user_key is None or str(user_key).strip() == "":
+            self._gc()
             return self.db.get("s", [])
         u = self._find_user(user_key)
         if u is None:
             return []
-        out = []
-        for s in self.db.get("s", []):
-            if str(s.get("u")) == str(u.get("id")):
-                out.append(s)
-        return out
+        return self._ss(u)
 
     def del_session(self, sid):
         ok = 0
-        nn = []
-        for s in self.db.get("s", []):
-            if str(s.get("id")) == str(sid):
-                ok = 1
-            else:
-                nn.append(s)
-        self.db["s"] = nn
-        if ok == 1:
+        k = self.si.pop(str(sid), None)
+        if k is not None:
+            ok = 1
+            self._agdel(self.db["s"][k])
+            self._rb(self.db["s"][k], -1)
+            self._sdel(k)
+            self._gc(64)
             self.st["dirty"] = 1
         self.st["last"] = "del_session"
         return ok
@@ -185,133 +524,369 @@ class Z:
         u = self._find_user(user_key)
         if u is None:
             return {"ok": 0}
-        ss = self.list_sessions(user_key)
-        if len(ss) == 0:
+        a = self.ag.get(str(u.get("id")))
+        if a is None or a["n"] == 0:
             return {"ok": 1, "name": u.get("name"), "count": 0, "sum_m": 0, "avg_m": 0, "sum_score": 0, "avg_score": 0, "best": None, "worst": None}
-        sm = 0
-        sc = 0
-        best = None
-        worst = None
-        for s in ss:
-            try:
-                sm += int(s.get("m", 0))
-            except Exception:
-                sm += 0
-            try:
-                sc += float(s.get("score", 0))
-            except Exception:
-                sc += 0.0
-            if best is None or float(s.get("score", 0)) > float(best.get("score", 0)):
-                best = s
-            if worst is None or float(s.get("score", 0)) < float(worst.get("score", 0)):
-                worst = s
-        avgm = sm / (len(ss) if len(ss) != 0 else 1)
-        avgs = sc / (len(ss) if len(ss) != 0 else 1)
+        if a["x"] == 1:
+            sc = 0
+            for s in self._ss(u):
+                try:
+                    sc += float(s.get("score", 0))
+                except Exception:
+                    sc += 0.0
+            a["sc"] = sc
+            a["x"] = 0
+        n = a["n"]
+        sm = a["m"]
+        sc = a["sc"]
+        avgm = sm / n
+        avgs = sc / n
         if avgm < 0:
             avgm = -avgm
         if avgs < 0:
             avgs = -avgs
-        return {"ok": 1, "name": u.get("name"), "count": len(ss), "sum_m": sm, "avg_m": avgm, "sum_score": sc, "avg_score": avgs, "best": best, "worst": worst}
+        return {"ok": 1, "name": u.get("name"), "count": n, "sum_m": sm, "avg_m": avgm, "sum_score": sc, "avg_score": avgs, "best": self._top(a, "hb"), "worst": self._top(a, "hw")}
 
     def _find_user(self, key):
         k = str(key)
+        u = self.ui.get(k)
+        if u is None:
+            u = self.un.get(k)
+        return u
+
+    def _uix(self):
+        self.ui = {}
+        self.un = {}
         for u in self.db.get("u", []):
-            if str(u.get("id")) == k or str(u.get("name")) == k:
-                return u
-        return None
+            self.ui.setdefault(str(u.get("id")), u)
+            self.un.setdefault(str(u.get("name")), u)
 
-    def _calc_score(self, minutes, mood, note, userobj):
-        lvl = self._lvl()
-        w = self._weird()
-        base = 0.0
-        m = minutes
-        if m < 1:
-            m = 1
-        if m > 5000:
-            m = 5000
-        if mood == "bad":
-            base = base - 10
-        elif mood == "meh":
-            base = base - 2
-        elif mood == "ok":
-            base = base + 1
-        elif mood == "good":
-            base = base + 5
-        elif mood == "great":
-            base = base + 9
-        elif mood == "focus":
-            base = base + 7
-        elif mood == "tired":
-            base = base - 4
-        elif mood == "angry":
-            base = base - 6
-        else:
-            base = base + 0
+    def _ss(self, u):
+        d = self.db["s"]
+        return [d[k] for k in self.us.get(str(u.get("id")), []) if d[k] is not None]
 
-        if len(note) > 40:
-            base += 2
-        elif len(note) > 10:
-            base += 1
-        else:
-            base += 0
+    def rescore_all(self):
+        self._gc()
+        ss = self.db["s"]
+        f = self._eng().score
+        ui = self.ui
+        for s in ss:
+            try:
+                m = int(s.get("m", 0))
+            except Exception:
+                m = 0
+            s["score"] = f(m, s.get("mood", ""), str(s.get("note", "")), ui.get(str(s.get("u"))))
+        self._agall()
+        if len(ss) > 0:
+            self.st["dirty"] = 1
+        self.st["last"] = "rescore_all"
+        return len(ss)
 
-        if userobj is not None:
-            nm = str(userobj.get("name", ""))
-            if len(nm) % 2 == 0:
-                base += 0.7
-            else:
-                base -= 0.3
-            if len(nm) > 8:
-                base += 0.9
+    def _agall(self):
+        self.ag = {}
+        self.rb = {"d": {}, "w": {}}
+        self.ub = {}
+        self.rz = 1
+        ag = self.ag
+        q = 0
+        for s in self.db["s"]:
+            if s is None:
+                continue
+            k = str(s.get("u"))
+            try:
+                m = int(s.get("m", 0))
+            except Exception:
+                m = 0
+            try:
+                f = float(s.get("score", 0))
+            except Exception:
+                f = 0.0
+            a = ag.get(k)
+            if a is None:
+                a = {"n": 0, "m": 0, "sc": 0, "x": 0, "v": 0, "hz": 1, "hb": [], "hw": []}
+                ag[k] = a
+            a["m"] += m
+            a["sc"] += f
+            a["n"] += 1
+            q = q + 1
+            i = str(s.get("id"))
+            a["hb"].append((-f, q, i))
+            a["hw"].append((f, q, i))
+        self.sq = q
+        self._lball()
 
-        if m > 180:
-            base += 4
-        elif m > 90:
-            base += 2
-        elif m > 30:
-            base += 1
-        else:
-            base -= 0.5
+    def _rball(self):
+        self.rb = {"d": {}, "w": {}}
+        self.ub = {}
+        self.rz = 0
+        rd = self.rb["d"]
+        rw = self.rb["w"]
+        ub = self.ub
+        bk = self._bk
+        for s in self.db["s"]:
+            if s is None:
+                continue
+            d, w = bk(s.get("ts"))
+            if w == "":
+                continue
+            k = str(s.get("u"))
+            try:
+                m = int(s.get("m", 0))
+            except Exception:
+                m = 0
+            try:
+                f = float(s.get("score", 0))
+            except Exception:
+                f = 0.0
+            uo = ub.get(k)
+            if uo is None:
+                uo = {"d": {}, "w": {}}
+                ub[k] = uo
+            for o, x in ((rd, d), (rw, w), (uo["d"], d), (uo["w"], w)):
+                v = o.get(x)
+                if v is None:
+                    o[x] = [1, m, 0.0 + f]
+                else:
+                    v[0] += 1
+                    v[1] += m
+                    v[2] += f
 
-        if lvl <= 0:
-            lvl = 1
-        if lvl == 1:
-            base = base + math.log(m + 1)
-        elif lvl == 2:
-            base = base + (math.log(m + 1) * 1.2) + (m * 0.01)
-        elif lvl == 3:
-            base = base + (math.log(m + 1) * 1.5) + (m * 0.02)
-        elif lvl == 4:
-            base = base + (math.log(m + 1) * 1.9) + (m * 0.03)
+    def rollup(self, user_key=None, unit="d", a=None, b=None):
+        if self.rz == 1:
+            self._rball()
+        if user_key is None or str(user_key).strip() == "":
+            o = self.rb
         else:
-            base = base + (math.log(m + 1) * 0.9) + (m * 0.005)
-
-        if w == 1:
-            if int(time.time()) % 2 == 0:
-                base += 0.11
+            u = self._find_user(user_key)
+            if u is None:
+                return []
+            o = self.ub.get(str(u.get("id")), {"d": {}, "w": {}})
+        if unit != "w":
+            unit = "d"
+        try:
+            y = datetime.date.fromisoformat(str(b)[:10])
+        except Exception:
+            y = datetime.date.today()
+        try:
+            x = datetime.date.fromisoformat(str(a)[:10])
+        except Exception:
+            if unit == "d":
+                x = y - datetime.timedelta(days=89)
             else:
-                base -= 0.07
-            if int(time.time()) % 5 == 0:
-                base += 0.33
-        elif w == 2:
-            r = random.randint(1, 10)
-            if r > 7:
-                base += 0.5
-            elif r > 4:
-                base += 0.1
+                x = y - datetime.timedelta(weeks=11)
+        st = datetime.timedelta(days=1)
+        if unit == "w":
+            x = x - datetime.timedelta(days=x.weekday())
+            st = datetime.timedelta(weeks=1)
+        out = []
+        while x <= y:
+            k = x.isoformat()
+            if unit == "w":
+                k = self._bk(k)[1]
+            v = o[unit].get(k)
+            if v is None:
+                out.append([k, 0, 0, 0.0])
             else:
-                base -= 0.2
+                out.append([k, v[0], v[1], v[2]])
+            x = x + st
+        return out
+
+    def _bk(self, ts):
+        d = str(ts)[:10]
+        w = self.wk.get(d)
+        if w is None:
+            try:
+                c = datetime.date.fromisoformat(d).isocalendar()
+                w = "%04d-W%02d" % (c[0], c[1])
+            except Exception:
+                w = ""
+            self.wk[d] = w
+        return d, w
+
+    def _rb(self, s, sg):
+        try:
+            m = int(s.get("m", 0))
+        except Exception:
+            m = 0
+        try:
+            f = float(s.get("score", 0))
+        except Exception:
+            f = 0.0
+        self._rbn(str(s.get("u")), s.get("ts"), sg, sg * m, sg * f)
+
+    def _rbn(self, k, ts, n, m, f):
+        if self.rz == 1:
+            return
+        d, w = self._bk(ts)
+        if w == "":
+            return
+        uo = self.ub.get(k)
+        if uo is None:
+            uo = {"d": {}, "w": {}}
+            self.ub[k] = uo
+        for o in (self.rb, uo):
+            for c, x in (("d", d), ("w", w)):
+                v = o[c].get(x)
+                if v is None:
+                    v = [0, 0, 0.0]
+                    o[c][x] = v
+                v[0] += n
+                v[1] += m
+                v[2] += f
+                if v[0] <= 0:
+                    del o[c][x]
+
+    def _agn(self, k):
+        a = self.ag.get(k)
+        if a is None:
+            a = {"n": 0, "m": 0, "sc": 0, "x": 0, "v": 0, "hz": 0, "hb": [], "hw": []}
+            self.ag[k] = a
+        return a
+
+    def _agadd(self, s, p=1):
+        a = self._agn(str(s.get("u")))
+        try:
+            a["m"] += int(s.get("m", 0))
+        except Exception:
+            a["m"] += 0
+        try:
+            f = float(s.get("score", 0))
+            a["sc"] += f
+        except Exception:
+            f = 0.0
+            a["sc"] += 0.0
+        a["n"] += 1
+        self.sq = self.sq + 1
+        i = str(s.get("id"))
+        if p == 1 and a["hz"] == 0:
+            heapq.heappush(a["hb"], (-f, self.sq, i))
+            heapq.heappush(a["hw"], (f, self.sq, i))
         else:
-            if (m + len(note)) % 3 == 0:
-                base += 0.06
-            else:
-                base -= 0.02
+            a["hb"].append((-f, self.sq, i))
+            a["hw"].append((f, self.sq, i))
+            a["hz"] = 1
 
-        if base > 9999:
-            base = 9999
-        if base < -9999:
-            base = -9999
-        return round(base, 3)
+    def _agdel(self, s):
+        k = str(s.get("u"))
+        a = self.ag.get(k)
+        if a is None:
+            return
+        a["n"] -= 1
+        if a["n"] <= 0:
+            del self.ag[k]
+            return
+        try:
+            a["m"] -= int(s.get("m", 0))
+        except Exception:
+            a["m"] -= 0
+        try:
+            a["sc"] -= float(s.get("score", 0))
+        except Exception:
+            a["sc"] -= 0.0
+        a["x"] = 1
+        if len(a["hb"]) > 64 and len(a["hb"]) > a["n"] * 2:
+            a["hb"] = [e for e in a["hb"] if e[2] in self.si]
+            a["hw"] = [e for e in a["hw"] if e[2] in self.si]
+            a["hz"] = 1
+        self._lbpush(k)
+
+    def leaders(self, by="m", k=10):
+        h = self.lb.get(by)
+        if h is None:
+            return []
+        out = []
+        keep = []
+        while len(h) > 0 and len(out) < k:
+            e = heapq.heappop(h)
+            a = self.ag.get(e[1])
+            if a is None or a["v"] != e[2]:
+                continue
+            keep.append(e)
+            u = self.ui.get(e[1])
+            if u is not None:
+                out.append({"u": e[1], "name": u.get("name"), "v": -e[0]})
+        for e in keep:
+            heapq.heappush(h, e)
+        return out
+
+    def _lbv(self, a):
+        b = self._top(a, "hb")
+        return (a["m"], a["sc"] / a["n"], a["n"], float(b.get("score", 0)) if b is not None else 0.0)
+
+    def _lbpush(self, k):
+        a = self.ag.get(k)
+        if a is None:
+            return
+        if len(self.lb["m"]) > len(self.ag) * 2 + 64:
+            self._lball()
+            return
+        self.lv = self.lv + 1
+        a["v"] = self.lv
+        vv = self._lbv(a)
+        heapq.heappush(self.lb["m"], (-vv[0], k, a["v"]))
+        heapq.heappush(self.lb["avg"], (-vv[1], k, a["v"]))
+        heapq.heappush(self.lb["n"], (-vv[2], k, a["v"]))
+        heapq.heappush(self.lb["best"], (-vv[3], k, a["v"]))
+
+    def _lball(self):
+        self.lb = {"m": [], "avg": [], "n": [], "best": []}
+        for k, a in self.ag.items():
+            self.lv = self.lv + 1
+            a["v"] = self.lv
+            vv = self._lbv(a)
+            self.lb["m"].append((-vv[0], k, a["v"]))
+            self.lb["avg"].append((-vv[1], k, a["v"]))
+            self.lb["n"].append((-vv[2], k, a["v"]))
+            self.lb["best"].append((-vv[3], k, a["v"]))
+        for h in self.lb.values():
+            heapq.heapify(h)
+
+    def _top(self, a, c):
+        if a["hz"] == 1:
+            heapq.heapify(a["hb"])
+            heapq.heapify(a["hw"])
+            a["hz"] = 0
+        h = a[c]
+        while len(h) > 0:
+            k = self.si.get(h[0][2])
+            if k is not None:
+                return self.db["s"][k]
+            heapq.heappop(h)
+        return None
+
+    def _six(self):
+        self.si = {}
+        self.us = {}
+        k = 0
+        for s in self.db.get("s", []):
+            self.si[str(s.get("id"))] = k
+            self.us.setdefault(str(s.get("u")), []).append(k)
+            k = k + 1
+
+    def _sdel(self, k):
+        self.db["s"][k] = None
+        self.nh = self.nh + 1
+
+    def _gc(self, lim=0):
+        if self.nh == 0:
+            return
+        if lim > 0 and (self.nh <= lim or self.nh * 2 <= len(self.db["s"])):
+            return
+        self.db["s"] = [s for s in self.db["s"] if s is not None]
+        self.nh = 0
+        self._six()
+
+    def _calc_score(self, minutes, mood, note, userobj):
+        return self._eng().score(minutes, mood, note, userobj)
+
+    def _eng(self):
+        if self.en is None or self.en.v != self.cf.v:
+            self.en = Sc(self.cf.lvl, self.cf.weird, self.cf.cap, self.cf.v)
+        return self.en
+
+    def set_cfg(self, k, v):
+        self.cf.set(self.db["cfg"], k, v)
+        self.st["dirty"] = 1
 
 def _inp(p):
     try:
@@ -351,6 +926,9 @@ def _mS():
     print("3) Add")
     print("4) Delete")
     print("5) Stats for user")
+    print("6) Import file (csv/jsonl)")
+    print("7) Leaderboard")
+    print("8) Daily/weekly totals")
     print("0) Back")
     print("---------------")
     print("")
@@ -362,6 +940,7 @@ def _mC():
     print("2) Set level (1-5)")
     print("3) Set weird (0-3)")
     print("4) Set cap (1-9999)")
+    print("5) Rescore all sessions")
     print("0) Back")
     print("-------------")
     print("")
@@ -475,6 +1054,43 @@ def _stats_user(z):
         elif st.get("avg_score", 0) < -2:
             print("Oof.")
 
+def _import_sessions(z):
+    p = _inp("File (.csv/.jsonl): ").strip()
+    t0 = time.time()
+    rp = z.import_sessions(p)
+    print("Imported:", rp.get("ok"), "Rejected:", rp.get("rej"), "(" + str(round(time.time() - t0, 2)) + "s)")
+    for ln, why in rp.get("bad", [])[:10]:
+        print("  line", ln, ":", why)
+    if rp.get("rej", 0) > 10:
+        print("  ...")
+
+def _leaders(z):
+    by = _inp("By (m/avg/n/best): ").strip()
+    if by == "":
+        by = "m"
+    ll = z.leaders(by, 10)
+    if len(ll) == 0:
+        print("Nothing.")
+    i = 0
+    for e in ll:
+        i += 1
+        v = e.get("v")
+        if isinstance(v, float):
+            v = round(v, 3)
+        print(str(i) + ") " + str(e.get("name")) + " = " + str(v))
+
+def _rollup(z):
+    k = _inp("User id or name (empty = all): ").strip()
+    c = _inp("Unit (d/w): ").strip()
+    a = _inp("From (YYYY-MM-DD, empty = auto): ").strip()
+    b = _inp("To (YYYY-MM-DD, empty = today): ").strip()
+    rr = z.rollup(k, c, a if a != "" else None, b if b != "" else None)
+    if len(rr) == 0:
+        print("Nothing.")
+    for r in rr:
+        if r[1] > 0:
+            print(r[0] + " count=" + str(r[1]) + " min=" + str(r[2]) + " score=" + str(round(r[3], 3)))
+
 def _show_cfg(z):
     cfg = z.db.get("cfg", {})
     print("lvl:", cfg.get("lvl"))
@@ -491,8 +1107,7 @@ def _set_lvl(z):
         vv = 1
     if vv > 5:
         vv = 5
-    z.db["cfg"]["lvl"] = vv
-    z.st["dirty"] = 1
+    z.set_cfg("lvl", vv)
     if vv == 5:
         print("Max level.")
     else:
@@ -508,8 +1123,7 @@ def _set_weird(z):
         vv = 0
     if vv > 3:
         vv = 3
-    z.db["cfg"]["weird"] = vv
-    z.st["dirty"] = 1
+    z.set_cfg("weird", vv)
     if vv == 0:
         print("Weird off.")
     else:
@@ -525,13 +1139,17 @@ def _set_cap(z):
         vv = 1
     if vv > 9999:
         vv = 9999
-    z.db["cfg"]["cap"] = vv
-    z.st["dirty"] = 1
+    z.set_cfg("cap", vv)
     if vv > 5000:
         print("High cap.")
     else:
         print("Ok.")
 
+def _rescore(z):
+    t0 = time.time()
+    n = z.rescore_all()
+    print("Rescored:", n, "(" + str(round(time.time() - t0, 2)) + "s)")
+
 def main():
     z = Z()
     z.load()
@@ -581,6 +1199,12 @@ def main():
                     _del_session(z)
                 elif x == "5":
                     _stats_user(z)
+                elif x == "6":
+                    _import_sessions(z)
+                elif x == "7":
+                    _leaders(z)
+                elif x == "8":
+                    _rollup(z)
                 elif x == "0":
                     go = 0
                 else:
@@ -601,6 +1225,8 @@ def main():
                     _set_weird(z)
                 elif x == "4":
                     _set_cap(z)
+                elif x == "5":
+                    _rescore(z)
                 elif x == "0":
                     go = 0
                 else:
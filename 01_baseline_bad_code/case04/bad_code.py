@@ -2,6 +2,81 @@ import os
 import json
 import time
 import random
+import sys
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+class Ids:
+    def __init__(self, bs=100000):
+        self.bs = bs
+        self.w = len(str(bs - 1))
+        self.pf = 0
+        self.n = bs
+
+    def see(self, i):
+        try:
+            v = int(str(i).split("-")[0])
+        except Exception:
+            return
+        if v >= self.pf:
+            self.pf = v
+            self.n = self.bs
+
+    def _blk(self):
+        t = int(time.time() * 1000)
+        if t <= self.pf:
+            t = self.pf + 1
+        self.pf = t
+        self.n = 0
+
+    def next(self):
+        if self.n >= self.bs:
+            self._blk()
+        self.n = self.n + 1
+        return str(self.pf) + "-" + str(self.n - 1).zfill(self.w)
+
+    def allocate(self, k):
+        out = []
+        while k > 0:
+            if self.n >= self.bs:
+                self._blk()
+            c = min(k, self.bs - self.n)
+            pf = str(self.pf) + "-"
+            out.extend([pf + str(j).zfill(self.w) for j in range(self.n, self.n + c)])
+            self.n = self.n + c
+            k = k - c
+        return out
+
+class Cfg:
+    def __init__(self, dv):
+        self.dv = dv
+        self.v = 0
+        self.load({})
+
+    def load(self, raw):
+        if not isinstance(raw, dict):
+            raw = {}
+        for k, x in self.dv.items():
+            setattr(self, k, self._co(raw.get(k, x), x))
+        self.v = self.v + 1
+
+    def set(self, raw, k, x):
+        raw[k] = x
+        setattr(self, k, self._co(x, self.dv[k]))
+        self.v = self.v + 1
+
+    def _co(self, x, dv):
+        if isinstance(x, (int, float)):
+            return x
+        try:
+            return int(x)
+        except Exception:
+            pass
+        try:
+            return float(x)
+        except Exception:
+            return dv
 
 class Q:
     def __init__(self):
@@ -11,6 +86,18 @@ class Q:
         self.k = 0
         self.tmp = {"a": 0, "b": 0, "c": 0, "d": 0}
         self.n = 7
+        self.g = Ids()
+        self.cf = Cfg({"tax": 19, "disc": 3, "ship": 499, "cap": 999999})
+        self.ii = {}
+        self.ni = {}
+        self.cp = {}
+        self.cw = {}
+        self.ch = 0
+        self.mt = 0
+        self.lk = threading.RLock()
+        self.nl = contextlib.nullcontext()
+        self.il = [threading.Lock() for _ in range(64)]
+        self.wl = [threading.Lock() for _ in range(64)]
 
     def load(self):
         self.st["loaded"] = 1
@@ -30,23 +117,31 @@ class Q:
                 self.db = {"i": [], "c": [], "o": [], "cfg": {"tax": 19, "disc": 3, "ship": 499, "cap": 999999}}
         else:
             self.db = {"i": [], "c": [], "o": [], "cfg": {"tax": 19, "disc": 3, "ship": 499, "cap": 999999}}
+        for c in ("i", "c", "o"):
+            if len(self.db[c]) > 0:
+                self.g.see(max(str(e.get("id")) for e in self.db[c]))
+        self.cf.load(self.db["cfg"])
+        self._iix()
+        self.ch = 0
+        self._cix()
         self.st["last"] = "load"
         return 1
 
     def save(self):
-        try:
-            with open(self.p, "w", encoding="utf-8") as f:
-                f.write(json.dumps(self.db, ensure_ascii=False, indent=2))
-            self.st["dirty"] = 0
-            self.st["last"] = "save"
-            return 1
-        except Exception:
-            self.st["last"] = "save_fail"
-            return 0
+        with self._lk():
+            self._cgc()
+            try:
+                with open(self.p, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(self.db, ensure_ascii=False, indent=2))
+                self.st["dirty"] = 0
+                self.st["last"] = "save"
+                return 1
+            except Exception:
+                self.st["last"] = "save_fail"
+                return 0
 
     def _id(self):
-        self.k += 1
-        return str(int(time.time() * 1000)) + "-" + str(self.k) + "-" + str(random.randint(10, 99))
+        return self.g.next()
 
     def _ts(self):
         return time.strftime("%Y-%m-%d %H:%M:%S")
@@ -67,35 +162,43 @@ class Q:
             pc = -pc
         if st < 0:
             st = -st
-        if pc > self.db["cfg"].get("cap", 999999):
-            pc = self.db["cfg"].get("cap", 999999)
-        iid = self._id()
-        o = {"id": iid, "n": n, "p": pc, "s": st, "ts": self._ts(), "x": 0, "y": 0}
-        if len(n) > 10:
-            o["x"] = 1
-        if pc % 2 == 0:
-            o["y"] = 1
-        self.db["i"].append(o)
-        self.st["dirty"] = 1
-        self.st["last"] = "add_item"
-        return iid
+        if pc > self.cf.cap:
+            pc = self.cf.cap
+        with self._lk():
+            iid = self._id()
+            o = {"id": iid, "n": n, "p": pc, "s": st, "ts": self._ts(), "x": 0, "y": 0}
+            if len(n) > 10:
+                o["x"] = 1
+            if pc % 2 == 0:
+                o["y"] = 1
+            self.db["i"].append(o)
+            self.ii[iid] = o
+            self.ni.setdefault(n, o)
+            self.st["dirty"] = 1
+            self.st["last"] = "add_item"
+            return iid
 
     def del_item(self, key):
-        ok = 0
-        nn = []
-        for it in self.db.get("i", []):
-            if str(it.get("id")) == str(key) or str(it.get("n")) == str(key):
-                ok = 1
-            else:
-                nn.append(it)
-        self.db["i"] = nn
-        if ok == 1:
-            for cc in self.db.get("c", []):
-                if str(cc.get("iid")) == str(key):
-                    cc["dead"] = 1
-            self.st["dirty"] = 1
-        self.st["last"] = "del_item"
-        return ok
+        with self._lk():
+            ok = 0
+            if str(key) not in self.ii and str(key) not in self.ni:
+                self.st["last"] = "del_item"
+                return ok
+            nn = []
+            for it in self.db.get("i", []):
+                if str(it.get("id")) == str(key) or str(it.get("n")) == str(key):
+                    ok = 1
+                else:
+                    nn.append(it)
+            self.db["i"] = nn
+            if ok == 1:
+                self._iix()
+                for cc in self.db.get("c", []):
+                    if cc is not None and str(cc.get("iid")) == str(key):
+                        cc["dead"] = 1
+                self.st["dirty"] = 1
+            self.st["last"] = "del_item"
+            return ok
 
     def list_items(self):
         return self.db.get("i", [])
@@ -104,54 +207,66 @@ class Q:
         w = str(who).strip() if who is not None else ""
         if w == "":
             w = "guest"
-        it = self._find_item(item_key)
-        if it is None:
-            return 0
-        try:
-            q = int(qty)
-        except Exception:
-            q = 1
-        if q <= 0:
-            q = 1
-        if q > 999:
-            q = 999
-        cid = self._id()
-        o = {"id": cid, "w": w, "iid": it.get("id"), "in": it.get("n"), "q": q, "p": it.get("p"), "ts": self._ts(), "dead": 0}
-        if it.get("s", 0) <= 0:
-            o["dead"] = 1
-        self.db["c"].append(o)
-        self.st["dirty"] = 1
-        self.st["last"] = "add_cart"
-        return cid
+        with self._ul(w):
+            it = self._find_item(item_key)
+            if it is None:
+                return 0
+            try:
+                q = int(qty)
+            except Exception:
+                q = 1
+            if q <= 0:
+                q = 1
+            if q > 999:
+                q = 999
+            with self._lk():
+                cid = self._id()
+                o = {"id": cid, "w": w, "iid": it.get("id"), "in": it.get("n"), "q": q, "p": it.get("p"), "ts": self._ts(), "dead": 0}
+                if it.get("s", 0) <= 0:
+                    o["dead"] = 1
+                k = len(self.db["c"])
+                self.db["c"].append(o)
+                self.cp[cid] = k
+                self.cw.setdefault(w, []).append(k)
+                self.st["dirty"] = 1
+                self.st["last"] = "add_cart"
+                return cid
 
     def del_cart(self, cid):
-        ok = 0
-        nn = []
-        for c in self.db.get("c", []):
-            if str(c.get("id")) == str(cid):
-                ok = 1
-            else:
-                nn.append(c)
-        self.db["c"] = nn
-        if ok == 1:
-            self.st["dirty"] = 1
-        self.st["last"] = "del_cart"
-        return ok
+        w = ""
+        with self._lk():
+            k = self.cp.get(str(cid))
+            if k is not None:
+                w = self.db["c"][k].get("w")
+        with self._ul(w):
+            with self._lk():
+                ok = 0
+                k = self.cp.pop(str(cid), None)
+                if k is not None:
+                    ok = 1
+                    self._cdel(k)
+                    self._cgc(64)
+                    self.st["dirty"] = 1
+                self.st["last"] = "del_cart"
+                return ok
 
     def list_cart(self, who=None):
         w = str(who).strip() if who is not None else ""
-        if w == "":
-            return self.db.get("c", [])
-        out = []
-        for c in self.db.get("c", []):
-            if str(c.get("w")) == w:
-                out.append(c)
-        return out
+        with self._lk():
+            if w == "":
+                self._cgc()
+                return self.db.get("c", [])
+            d = self.db["c"]
+            return [d[k] for k in self.cw.get(w, []) if d[k] is not None]
 
     def checkout(self, who):
         w = str(who).strip() if who is not None else ""
         if w == "":
             w = "guest"
+        with self._ul(w):
+            return self._checkout(w)
+
+    def _checkout(self, w):
         items = self.list_cart(w)
         if len(items) == 0:
             return {"ok": 0, "msg": "empty"}
@@ -164,9 +279,9 @@ class Q:
                 sub += int(c.get("p", 0)) * int(c.get("q", 1))
             except Exception:
                 sub += 0
-        taxp = self.db.get("cfg", {}).get("tax", 19)
-        discp = self.db.get("cfg", {}).get("disc", 3)
-        ship = self.db.get("cfg", {}).get("ship", 499)
+        taxp = self.cf.tax
+        discp = self.cf.disc
+        ship = self.cf.ship
         if sub > 50000:
             ship = 0
         if sub < 1000:
@@ -183,73 +298,207 @@ class Q:
             total = 0
         if total > 999999999:
             total = 999999999
-        oid = self._id()
-        o = {"id": oid, "w": w, "sub": sub, "tax": tax, "ship": ship, "disc": disc, "total": total, "dead": dead, "ts": self._ts(), "status": "new"}
-        if total == 0:
-            o["status"] = "weird"
-        if dead > 0 and total > 0:
-            o["status"] = "hold"
-        if total > 250000:
-            o["status"] = "big"
-        self.db["o"].append(o)
-        self._decrease_stock(items)
-        self._clear_cart(w)
-        self.st["dirty"] = 1
-        self.st["last"] = "checkout"
-        return {"ok": 1, "order": o}
+        need = self._qty(items)
+        with self._ils(need):
+            if self.mt == 1 and self._short(need) == 1:
+                return {"ok": 0, "msg": "stock"}
+            with self._lk():
+                oid = self._id()
+                o = {"id": oid, "w": w, "sub": sub, "tax": tax, "ship": ship, "disc": disc, "total": total, "dead": dead, "ts": self._ts(), "status": "new"}
+                if total == 0:
+                    o["status"] = "weird"
+                if dead > 0 and total > 0:
+                    o["status"] = "hold"
+                if total > 250000:
+                    o["status"] = "big"
+                self.db["o"].append(o)
+                if self.mt == 0:
+                    self._decrease_stock(items)
+                else:
+                    self._take(need)
+                self._clear_cart(w)
+                self.st["dirty"] = 1
+                self.st["last"] = "checkout"
+                return {"ok": 1, "order": o}
 
     def list_orders(self, who=None):
         w = str(who).strip() if who is not None else ""
-        if w == "":
-            return self.db.get("o", [])
-        out = []
-        for o in self.db.get("o", []):
-            if str(o.get("w")) == w:
-                out.append(o)
-        return out
+        with self._lk():
+            if w == "":
+                return self.db.get("o", [])
+            out = []
+            for o in self.db.get("o", []):
+                if str(o.get("w")) == w:
+                    out.append(o)
+            return out
 
     def del_order(self, oid):
-        ok = 0
-        nn = []
-        for o in self.db.get("o", []):
-            if str(o.get("id")) == str(oid):
-                ok = 1
-            else:
-                nn.append(o)
-        self.db["o"] = nn
-        if ok == 1:
-            self.st["dirty"] = 1
-        self.st["last"] = "del_order"
-        return ok
+        with self._lk():
+            ok = 0
+            nn = []
+            for o in self.db.get("o", []):
+                if str(o.get("id")) == str(oid):
+                    ok = 1
+                else:
+                    nn.append(o)
+            self.db["o"] = nn
+            if ok == 1:
+                self.st["dirty"] = 1
+            self.st["last"] = "del_order"
+            return ok
+
+    def set_cfg(self, k, v):
+        self.cf.set(self.db["cfg"], k, v)
+        self.st["dirty"] = 1
 
     def _clear_cart(self, who):
-        nn = []
+        for k in self.cw.pop(str(who), []):
+            c = self.db["c"][k]
+            if c is not None:
+                self.cp.pop(str(c.get("id")), None)
+                self._cdel(k)
+        self._cgc(64)
+
+    def _cix(self):
+        self.cp = {}
+        self.cw = {}
+        k = 0
         for c in self.db.get("c", []):
-            if str(c.get("w")) == str(who):
-                pass
-            else:
-                nn.append(c)
-        self.db["c"] = nn
+            self.cp[str(c.get("id"))] = k
+            self.cw.setdefault(str(c.get("w")), []).append(k)
+            k = k + 1
+
+    def _cdel(self, k):
+        self.db["c"][k] = None
+        self.ch = self.ch + 1
+
+    def _cgc(self, lim=0):
+        if self.ch == 0:
+            return
+        if lim > 0 and (self.ch <= lim or self.ch * 2 <= len(self.db["c"])):
+            return
+        self.db["c"] = [c for c in self.db["c"] if c is not None]
+        self.ch = 0
+        self._cix()
 
     def _find_item(self, key):
         k = str(key)
+        it = self.ii.get(k)
+        if it is None:
+            it = self.ni.get(k)
+        return it
+
+    def _iix(self):
+        self.ii = {}
+        self.ni = {}
         for it in self.db.get("i", []):
-            if str(it.get("id")) == k or str(it.get("n")) == k:
-                return it
-        return None
+            self.ii.setdefault(str(it.get("id")), it)
+            self.ni.setdefault(str(it.get("n")), it)
 
-    def _decrease_stock(self, cart_items):
+    def _qty(self, cart_items):
+        w = {}
         for c in cart_items:
-            iid = c.get("iid")
-            q = c.get("q", 1)
-            for it in self.db.get("i", []):
-                if str(it.get("id")) == str(iid):
-                    try:
-                        it["s"] = int(it.get("s", 0)) - int(q)
-                    except Exception:
-                        it["s"] = it.get("s", 0)
-                    if it["s"] < 0:
-                        it["s"] = 0
+            try:
+                q = int(c.get("q", 1))
+            except Exception:
+                continue
+            k = str(c.get("iid"))
+            w[k] = w.get(k, 0) + q
+        return w
+
+    def _decrease_stock(self, cart_items):
+        w = self._qty(cart_items)
+        for k, q in w.items():
+            it = self.ii.get(k)
+            if it is None:
+                continue
+            try:
+                it["s"] = int(it.get("s", 0)) - q
+            except Exception:
+                it["s"] = it.get("s", 0)
+            if it["s"] < 0:
+                it["s"] = 0
+
+    def _ils(self, w):
+        st = contextlib.ExitStack()
+        if self.mt == 1:
+            for j in sorted(set(hash(k) % len(self.il) for k in w)):
+                st.enter_context(self.il[j])
+        return st
+
+    def _short(self, w):
+        for k, q in w.items():
+            it = self.ii.get(k)
+            if it is not None and self._stk(it) < q:
+                return 1
+        return 0
+
+    def _take(self, w):
+        for k, q in w.items():
+            it = self.ii.get(k)
+            if it is not None:
+                it["s"] = self._stk(it) - q
+
+    def _stk(self, it):
+        try:
+            return int(it.get("s", 0))
+        except Exception:
+            return 0
+
+    def concurrent(self, on=1):
+        self.mt = on
+
+    def _lk(self):
+        if self.mt == 1:
+            return self.lk
+        return self.nl
+
+    def _ul(self, w):
+        if self.mt == 0:
+            return self.nl
+        return self.wl[hash(w) % len(self.wl)]
+
+def _stress(nu=2000, ni=50, ns=20, nw=32):
+    q = Q()
+    q.concurrent(1)
+    ids = [q.add_item("s" + str(i), 100 + i, ns) for i in range(ni)]
+    rr = random.Random(7)
+    jj = []
+    for u in range(nu):
+        jj.append(("w" + str(u), [(ids[rr.randrange(ni)], rr.randint(1, 3)) for _ in range(rr.randint(1, 4))]))
+
+    def job(j):
+        w, ll = j
+        for iid, n in ll:
+            q.add_cart(w, iid, n)
+        r = q.checkout(w)
+        if r.get("ok") == 1:
+            return ll
+        return []
+
+    t0 = time.time()
+    sold = {}
+    ok = 0
+    with ThreadPoolExecutor(max_workers=nw) as ex:
+        for ll in ex.map(job, jj):
+            if len(ll) > 0:
+                ok += 1
+            for iid, n in ll:
+                sold[iid] = sold.get(iid, 0) + n
+    dt = time.time() - t0
+    bad = 0
+    for iid in ids:
+        it = q._find_item(iid)
+        if sold.get(iid, 0) > ns:
+            print("oversold:", iid, sold.get(iid, 0), ">", ns)
+            bad += 1
+        elif it["s"] != ns - sold.get(iid, 0):
+            print("stock drift:", iid, it["s"], "!=", ns - sold.get(iid, 0))
+            bad += 1
+    print("users:", nu, "checkouts ok:", ok, "sold:", sum(sold.values()), "of", ni * ns, "(" + str(round(dt, 2)) + "s, " + str(nw) + " threads)")
+    if bad > 0:
+        return 0
+    return 1
 
 def _inp(p):
     try:
@@ -468,8 +717,7 @@ def _set_tax(q):
         vv = 0
     if vv > 50:
         vv = 50
-    q.db["cfg"]["tax"] = vv
-    q.st["dirty"] = 1
+    q.set_cfg("tax", vv)
     if vv == 0:
         print("Tax off.")
     else:
@@ -485,8 +733,7 @@ def _set_disc(q):
         vv = 0
     if vv > 30:
         vv = 30
-    q.db["cfg"]["disc"] = vv
-    q.st["dirty"] = 1
+    q.set_cfg("disc", vv)
     if vv > 20:
         print("High disc.")
     else:
@@ -502,14 +749,17 @@ def _set_ship(q):
         vv = 0
     if vv > 99999:
         vv = 99999
-    q.db["cfg"]["ship"] = vv
-    q.st["dirty"] = 1
+    q.set_cfg("ship", vv)
     if vv == 0:
         print("Free ship.")
     else:
         print("Ok.")
 
 def main():
+    if "--stress" in sys.argv:
+        if _stress() == 0:
+            sys.exit(1)
+        return
     q = Q()
     q.load()
     run = 1
@@ -2,6 +2,8 @@ import os
 import json
 import datetime
 import random
+import sys
+from functools import lru_cache
 
 class DataManager:
     """Verwaltet die Datenstruktur, Dateizugriffe und Geschäftslogik."""
@@ -11,16 +13,25 @@ class DataManager:
         self.state = {"dirty": 0, "loaded": 0, "last": "", "mode": 0, "panic": 0}
         self.file_path = "data_bad_app.json"
         self.id_counter = 0
+        self.index = {"t": {}, "m": {}, "x": {}}
+        self.holes = {"t": 0, "m": 0, "x": 0}
 
     def get_data(self):
         if self.state["loaded"] == 0:
             self.load()
+        for key in ("t", "m", "x"):
+            self._compact(key)
         return self.data
 
     def load(self):
         self.state["loaded"] = 1
         self.state["last"] = "load"
+        self._read_file()
+        for key in ("t", "m", "x"):
+            self.holes[key] = 0
+            self._rebuild_index(key)
 
+    def _read_file(self):
         if not os.path.exists(self.file_path):
             self.data = {"t": [], "m": [], "x": []}
             return
@@ -42,6 +53,8 @@ class DataManager:
             self.data = {"t": [], "m": [], "x": []}
 
     def save(self):
+        for key in ("t", "m", "x"):
+            self._compact(key)
         try:
             with open(self.file_path, "w", encoding="utf-8") as f:
                 f.write(json.dumps(self.data, ensure_ascii=False, indent=2))
@@ -65,27 +78,23 @@ class DataManager:
             "done": 0,
             "ts": self._get_timestamp()
         }
-        self.data["t"].append(task)
+        self._append("t", task)
         self._set_dirty("addt")
         return task["id"]
 
     def toggle_task(self, task_id):
-        found = False
-        for task in self.data["t"]:
-            if str(task.get("id")) == str(task_id):
-                task["done"] = 1 if task.get("done") == 0 else 0
-                task["ts2"] = self._get_timestamp()
-                found = True
+        pos = self.index["t"].get(str(task_id))
+        if pos is None:
+            return 0
 
-        if found:
-            self._set_dirty("donet")
-        return 1 if found else 0
+        task = self.data["t"][pos]
+        task["done"] = 1 if task.get("done") == 0 else 0
+        task["ts2"] = self._get_timestamp()
+        self._set_dirty("donet")
+        return 1
 
     def delete_task(self, task_id):
-        original_count = len(self.data["t"])
-        self.data["t"] = [t for t in self.data["t"] if str(t.get("id")) != str(task_id)]
-
-        if len(self.data["t"]) < original_count:
+        if self._remove("t", task_id):
             self._set_dirty("delt")
             return 1
         return 0
@@ -111,21 +120,18 @@ class DataManager:
             "n": str(note or ""),
             "ts": self._get_timestamp()
         }
-        self.data["m"].append(transaction)
+        self._append("m", transaction)
         self._set_dirty("addm")
         return transaction["id"]
 
     def delete_transaction(self, trans_id):
-        original_count = len(self.data["m"])
-        self.data["m"] = [m for m in self.data["m"] if str(m.get("id")) != str(trans_id)]
-
-        if len(self.data["m"]) < original_count:
+        if self._remove("m", trans_id):
             self._set_dirty("delm")
             return 1
         return 0
 
     def get_balance(self):
-        return sum(float(m.get("a", 0.0)) for m in self.data["m"])
+        return sum(float(m.get("a", 0.0)) for m in self.data["m"] if m is not None)
 
     # --- Notiz-Logik ---
 
@@ -140,19 +146,57 @@ class DataManager:
             "ts": self._get_timestamp(),
             "k": self._calculate_weird_key(tag)
         }
-        self.data["x"].append(note)
+        self._append("x", note)
         self._set_dirty("addx")
         return note["id"]
 
     def delete_note(self, note_id):
-        original_count = len(self.data["x"])
-        self.data["x"] = [x for x in self.data["x"] if str(x.get("id")) != str(note_id)]
-
-        if len(self.data["x"]) < original_count:
+        if self._remove("x", note_id):
             self._set_dirty("delx")
             return 1
         return 0
 
+    def rekey_notes(self):
+        changed = 0
+        for note in self.data["x"]:
+            if note is None:
+                continue
+            key = self._calculate_weird_key(str(note.get("tag", "")))
+            if note.get("k") != key:
+                note["k"] = key
+                changed += 1
+
+        if changed:
+            self._set_dirty("rekey")
+        return changed
+
+    # --- Index (id -> Position) ---
+
+    def _append(self, key, record):
+        self.index[key][record["id"]] = len(self.data[key])
+        self.data[key].append(record)
+
+    def _remove(self, key, record_id):
+        pos = self.index[key].pop(str(record_id), None)
+        if pos is None:
+            return False
+        # Lücke statt Listenkopie; verdichtet wird erst bei vielen Lücken
+        self.data[key][pos] = None
+        self.holes[key] += 1
+        if self.holes[key] > 64 and self.holes[key] * 2 > len(self.data[key]):
+            self._compact(key)
+        return True
+
+    def _compact(self, key):
+        if not self.holes[key]:
+            return
+        self.data[key] = [e for e in self.data[key] if e is not None]
+        self.holes[key] = 0
+        self._rebuild_index(key)
+
+    def _rebuild_index(self, key):
+        self.index[key] = {str(e.get("id")): pos for pos, e in enumerate(self.data[key])}
+
     # --- Hilfsmethoden ---
 
     def _set_dirty(self, last_action):
@@ -167,7 +211,9 @@ class DataManager:
         ts = int(datetime.datetime.now().timestamp() * 1000)
         return f"{ts}-{self.id_counter}-{random.randint(10, 99)}"
 
-    def _calculate_weird_key(self, tag):
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _calculate_weird_key(tag):
         v = 13 if not tag else 0
         for ch in str(tag):
             v += ord(ch)
@@ -181,6 +227,8 @@ class DataManager:
 
 # --- UI Funktionen ---
 
+PAGE_SIZE = 50
+
 def safe_input(prompt):
     try:
         return input(prompt)
@@ -190,17 +238,44 @@ def safe_input(prompt):
 def print_header(title):
     print(f"\n---- {title} ----")
 
-def show_tasks(dm):
+def ask_range(rows):
+    if len(rows) <= PAGE_SIZE:
+        return 0, len(rows)
+    try:
+        start = int(safe_input("Ab Nr. (Enter=1, -N=letzte N): ").strip())
+    except ValueError:
+        start = 1
+    if start < 0:
+        return max(0, len(rows) + start), -start
+    return max(1, start) - 1, len(rows)
+
+def render_rows(rows, format_row, offset=None, count=None):
+    """Seitenweise Ausgabe: eine gepufferte Schreiboperation pro Seite, ohne die Liste zu kopieren."""
+    if offset is None:
+        offset, count = ask_range(rows)
+    end = min(len(rows), offset + (len(rows) if count is None else count))
+
+    while offset < end:
+        page_end = min(end, offset + PAGE_SIZE)
+        sys.stdout.write("".join(format_row(k + 1, rows[k]) + "\n" for k in range(offset, page_end)))
+        sys.stdout.flush()
+        offset = page_end
+        if offset < end and safe_input(f"-- {offset}/{end} (Enter=weiter, q=Ende) -- ").strip().lower() == "q":
+            break
+
+def format_task(i, t):
+    status = "X" if t.get("done") == 1 else " "
+    priority = t.get("pr", 0)
+    marks = "!!!" if priority >= 7 else ("!!" if priority >= 4 else "!")
+    return f"{i}) [{status}] {marks} pr={priority} id={t.get('id')} :: {t.get('txt')} ({t.get('ts')})"
+
+def show_tasks(dm, offset=None, count=None):
     tasks = dm.get_data().get("t", [])
     if not tasks:
         print("Keine Aufgaben.")
         return
 
-    for i, t in enumerate(tasks, 1):
-        status = "X" if t.get("done") == 1 else " "
-        priority = t.get("pr", 0)
-        marks = "!!!" if priority >= 7 else ("!!" if priority >= 4 else "!")
-        print(f"{i}) [{status}] {marks} pr={priority} id={t.get('id')} :: {t.get('txt')} ({t.get('ts')})")
+    render_rows(tasks, format_task, offset, count)
 
     if len(tasks) % 7 == 0:
         print("Viele Aufgaben heute...")
@@ -220,31 +295,35 @@ def add_task_ui(dm):
     level = "hoch" if pr >= 8 else ("mittel" if pr >= 4 else "")
     print(f"Hinzugefügt {f'({level})' if level else ''}: {task_id}")
 
-def show_money(dm):
+def format_transaction(i, m):
+    amount = float(m.get("a", 0.0))
+    sign = "+" if amount >= 0 else "-"
+    label = "EIN" if m.get("k") == "in" else ("AUS" if m.get("k") == "out" else "???")
+    marks = "!!!" if abs(amount) > 9999 else ("!!" if abs(amount) > 99 else "!")
+    return f"{i}) [{label}] id={m.get('id')} {sign}{abs(amount)} {marks} {m.get('n')} ({m.get('ts')})"
+
+def show_money(dm, offset=None, count=None):
     transactions = dm.get_data().get("m", [])
     if not transactions:
         print("Keine Buchungen.")
         return
 
-    for i, m in enumerate(transactions, 1):
-        amount = float(m.get("a", 0.0))
-        sign = "+" if amount >= 0 else "-"
-        label = "EIN" if m.get("k") == "in" else ("AUS" if m.get("k") == "out" else "???")
-        marks = "!!!" if abs(amount) > 9999 else ("!!" if abs(amount) > 99 else "!")
-        print(f"{i}) [{label}] id={m.get('id')} {sign}{abs(amount)} {marks} {m.get('n')} ({m.get('ts')})")
+    render_rows(transactions, format_transaction, offset, count)
+
+def format_note(i, n):
+    parity = "EVEN" if n.get("k", 0) % 2 == 0 else "ODD"
+    tag = n.get("tag") or "none"
+    text = n.get("txt", "")
+    display_text = (text[:60] + "...") if len(text) > 60 else text
+    return f"{i}) id={n.get('id')} [{tag}] {parity} k={n.get('k')} :: {display_text} ({n.get('ts')})"
 
-def show_notes(dm):
+def show_notes(dm, offset=None, count=None):
     notes = dm.get_data().get("x", [])
     if not notes:
         print("Keine Notizen.")
         return
 
-    for i, n in enumerate(notes, 1):
-        parity = "EVEN" if n.get("k", 0) % 2 == 0 else "ODD"
-        tag = n.get("tag") or "none"
-        text = n.get("txt", "")
-        display_text = (text[:60] + "...") if len(text) > 60 else text
-        print(f"{i}) id={n.get('id')} [{tag}] {parity} k={n.get('k')} :: {display_text} ({n.get('ts')})")
+    render_rows(notes, format_note, offset, count)
 
     if len(notes) % 4 == 0:
         print("Runde Zahl an Notizen.")
@@ -261,6 +340,13 @@ def run_sub_menu(dm, title, options, actions):
             print("Ungültig." if choice else "Leer.")
 
 def main():
+    global PAGE_SIZE
+    if "--page-size" in sys.argv:
+        try:
+            PAGE_SIZE = max(1, int(sys.argv[sys.argv.index("--page-size") + 1]))
+        except (IndexError, ValueError):
+            pass
+
     dm = DataManager()
     dm.load()
     tick = 0
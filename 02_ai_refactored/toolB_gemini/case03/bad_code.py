@@ -23,13 +23,19 @@ class LogbookManager:
         self.db = self.DEFAULT_DB.copy()
         self.state = {"loaded": 0, "dirty": 0, "last": ""}
         self.id_counter = 0
+        self.users_by_id = {}
+        self.users_by_name = {}
 
     # --- Persistenz ---
 
     def load(self):
         self.state["loaded"] = 1
         self.state["last"] = "load"
+        self._read_db()
+        self._rebuild_user_index()
+        return 1
 
+    def _read_db(self):
         if not os.path.exists(self.file_path):
             self.db = self.DEFAULT_DB.copy()
             return 1
@@ -49,7 +55,6 @@ class LogbookManager:
                 self.db = self.DEFAULT_DB.copy()
         except Exception:
             self.db = self.DEFAULT_DB.copy()
-        return 1
 
     def save(self):
         try:
@@ -81,10 +86,14 @@ class LogbookManager:
 
     def _find_user(self, key):
         search_key = str(key)
+        return self.users_by_id.get(search_key) or self.users_by_name.get(search_key)
+
+    def _rebuild_user_index(self):
+        self.users_by_id = {}
+        self.users_by_name = {}
         for user in self.db.get("u", []):
-            if str(user.get("id")) == search_key or str(user.get("name")) == search_key:
-                return user
-        return None
+            self.users_by_id.setdefault(str(user.get("id")), user)
+            self.users_by_name.setdefault(str(user.get("name")), user)
 
     def _set_dirty(self, action_name):
         self.state["dirty"] = 1
@@ -110,6 +119,8 @@ class LogbookManager:
         }
 
         self.db["u"].append(user)
+        self.users_by_id[user["id"]] = user
+        self.users_by_name[clean_name] = user
         self._set_dirty("add_user")
         return user["id"]
 
@@ -123,6 +134,9 @@ class LogbookManager:
 
         # User entfernen
         self.db["u"] = [u for u in self.db["u"] if str(u["id"]) != uid]
+        self.users_by_id.pop(uid, None)
+        if self.users_by_name.get(uname) is target_user:
+            del self.users_by_name[uname]
 
         # Zugehörige Sessions entfernen
         self.db["s"] = [
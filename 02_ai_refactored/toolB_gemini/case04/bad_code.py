@@ -11,6 +11,8 @@ class ShopManager:
         self.database = self._get_default_database()
         self.state = {"loaded": 0, "dirty": 0, "last": ""}
         self.id_counter = 0
+        self.items_by_id = {}
+        self.items_by_name = {}
 
     def _get_default_database(self):
         return {
@@ -23,9 +25,14 @@ class ShopManager:
     def load(self):
         self.state["loaded"] = 1
         self.state["last"] = "load"
+        self._read_database()
+        self._rebuild_item_index()
+        return 1
+
+    def _read_database(self):
         if not os.path.exists(self.file_path):
             self.database = self._get_default_database()
-            return 1
+            return
 
         try:
             with open(self.file_path, "r", encoding="utf-8") as f:
@@ -41,7 +48,6 @@ class ShopManager:
                     self.database = self._get_default_database()
         except Exception:
             self.database = self._get_default_database()
-        return 1
 
     def save(self):
         try:
@@ -90,6 +96,8 @@ class ShopManager:
         }
 
         self.database["i"].append(new_item)
+        self.items_by_id[item_id] = new_item
+        self.items_by_name.setdefault(item_name, new_item)
         self._mark_dirty("add_item")
         return item_id
 
@@ -102,6 +110,7 @@ class ShopManager:
                               if str(it.get("id")) != key_str and str(it.get("n")) != key_str]
 
         if len(self.database["i"]) < original_count:
+            self._rebuild_item_index()
             # Mark relevant cart items as dead
             for cart_item in self.database.get("c", []):
                 if str(cart_item.get("iid")) == key_str:
@@ -115,10 +124,14 @@ class ShopManager:
 
     def _find_item(self, key):
         key_str = str(key)
+        return self.items_by_id.get(key_str) or self.items_by_name.get(key_str)
+
+    def _rebuild_item_index(self):
+        self.items_by_id = {}
+        self.items_by_name = {}
         for it in self.database.get("i", []):
-            if str(it.get("id")) == key_str or str(it.get("n")) == key_str:
-                return it
-        return None
+            self.items_by_id.setdefault(str(it.get("id")), it)
+            self.items_by_name.setdefault(str(it.get("n")), it)
 
     # --- Cart Management ---
 
@@ -2,6 +2,8 @@ import os
 import json
 import datetime
 import random
+import sys
+from functools import lru_cache
 
 class DataManager:
     def __init__(self):
@@ -9,10 +11,14 @@ class DataManager:
         self.state = {"dirty": False, "loaded": False, "last_action": "", "mode": 0, "panic": 0}
         self.file_path = "data_bad_app.json"
         self.id_counter = 0
+        self.indexes = {"tasks": {}, "transactions": {}, "notes": {}}
+        self.hole_counts = {"tasks": 0, "transactions": 0, "notes": 0}
+        self.balance_cents = 0
 
     def get_data(self):
         if not self.state["loaded"]:
             self.load()
+        self._compact_all()
         return self.data
 
     def load(self):
@@ -21,6 +27,8 @@ class DataManager:
             self._initialize_empty_data()
         else:
             self._load_from_file()
+        self._rebuild_all_indexes()
+        self._rebuild_balance()
         self.state["last_action"] = "load"
 
     def _initialize_empty_data(self):
@@ -52,6 +60,7 @@ class DataManager:
             self._initialize_empty_data()
 
     def save(self):
+        self._compact_all()
         try:
             with open(self.file_path, "w", encoding="utf-8") as file:
                 json.dump(self.data, file, ensure_ascii=False, indent=2)
@@ -74,7 +83,7 @@ class DataManager:
             "timestamp": self._get_timestamp()
         }
 
-        self.data["tasks"].append(task)
+        self._append_record("tasks", task)
         self.state["dirty"] = True
         self.state["last_action"] = "add_task"
         return task["id"]
@@ -96,23 +105,17 @@ class DataManager:
         return True
 
     def delete_task(self, task_id):
-        initial_length = len(self.data["tasks"])
-        self.data["tasks"] = [
-            task for task in self.data["tasks"]
-            if str(task.get("id")) != str(task_id)
-        ]
-
-        deleted = len(self.data["tasks"]) != initial_length
+        deleted = self._remove_record("tasks", task_id)
         if deleted:
             self.state["dirty"] = True
         self.state["last_action"] = "delete_task"
         return deleted
 
     def _find_task_by_id(self, task_id):
-        for task in self.data["tasks"]:
-            if str(task.get("id")) == str(task_id):
-                return task
-        return None
+        position = self.indexes["tasks"].get(str(task_id))
+        if position is None:
+            return None
+        return self.data["tasks"][position]
 
     def add_transaction(self, kind, amount, note):
         kind = self._normalize_transaction_kind(kind)
@@ -126,7 +129,8 @@ class DataManager:
             "timestamp": self._get_timestamp()
         }
 
-        self.data["transactions"].append(transaction)
+        self._append_record("transactions", transaction)
+        self.balance_cents += self._to_cents(amount)
         self.state["dirty"] = True
         self.state["last_action"] = "add_transaction"
         return transaction["id"]
@@ -149,29 +153,35 @@ class DataManager:
         amount_float = abs(amount_float)
         if kind == "out":
             amount_float = -amount_float
-        return amount_float
+        return self._to_cents(amount_float) / 100
 
     def delete_transaction(self, transaction_id):
-        initial_length = len(self.data["transactions"])
-        self.data["transactions"] = [
-            transaction for transaction in self.data["transactions"]
-            if str(transaction.get("id")) != str(transaction_id)
-        ]
+        position = self.indexes["transactions"].get(str(transaction_id))
+        if position is not None:
+            transaction = self.data["transactions"][position]
+            self.balance_cents -= self._to_cents(transaction.get("amount", 0.0))
 
-        deleted = len(self.data["transactions"]) != initial_length
+        deleted = self._remove_record("transactions", transaction_id)
         if deleted:
             self.state["dirty"] = True
         self.state["last_action"] = "delete_transaction"
         return deleted
 
     def get_balance(self):
-        total = 0.0
-        for transaction in self.data["transactions"]:
-            try:
-                total += float(transaction.get("amount", 0.0))
-            except Exception:
-                continue
-        return total
+        return self.balance_cents / 100
+
+    def _rebuild_balance(self):
+        self.balance_cents = sum(
+            self._to_cents(transaction.get("amount", 0.0))
+            for transaction in self.data["transactions"]
+        )
+
+    @staticmethod
+    def _to_cents(amount):
+        try:
+            return int(round(float(amount) * 100))
+        except Exception:
+            return 0
 
     def add_note(self, tag, text):
         tag = str(tag) if tag is not None else ""
@@ -185,24 +195,71 @@ class DataManager:
             "key": self._calculate_note_key(tag)
         }
 
-        self.data["notes"].append(note)
+        self._append_record("notes", note)
         self.state["dirty"] = True
         self.state["last_action"] = "add_note"
         return note["id"]
 
     def delete_note(self, note_id):
-        initial_length = len(self.data["notes"])
-        self.data["notes"] = [
-            note for note in self.data["notes"]
-            if str(note.get("id")) != str(note_id)
-        ]
-
-        deleted = len(self.data["notes"]) != initial_length
+        deleted = self._remove_record("notes", note_id)
         if deleted:
             self.state["dirty"] = True
         self.state["last_action"] = "delete_note"
         return deleted
 
+    def rekey_notes(self):
+        changed_count = 0
+        for note in self.data["notes"]:
+            if note is None:
+                continue
+            key = self._calculate_note_key(str(note.get("tag", "")))
+            if note.get("key") != key:
+                note["key"] = key
+                changed_count += 1
+
+        if changed_count:
+            self.state["dirty"] = True
+        self.state["last_action"] = "rekey_notes"
+        return changed_count
+
+    def _append_record(self, collection, record):
+        self.indexes[collection][record["id"]] = len(self.data[collection])
+        self.data[collection].append(record)
+
+    def _remove_record(self, collection, record_id):
+        position = self.indexes[collection].pop(str(record_id), None)
+        if position is None:
+            return False
+
+        self.data[collection][position] = None
+        self.hole_counts[collection] += 1
+        records = self.data[collection]
+        if self.hole_counts[collection] > 64 and self.hole_counts[collection] * 2 > len(records):
+            self._compact(collection)
+        return True
+
+    def _compact_all(self):
+        for collection in self.indexes:
+            self._compact(collection)
+
+    def _compact(self, collection):
+        if self.hole_counts[collection] == 0:
+            return
+        self.data[collection] = [record for record in self.data[collection] if record is not None]
+        self.hole_counts[collection] = 0
+        self._rebuild_index(collection)
+
+    def _rebuild_all_indexes(self):
+        for collection in self.indexes:
+            self.hole_counts[collection] = 0
+            self._rebuild_index(collection)
+
+    def _rebuild_index(self, collection):
+        self.indexes[collection] = {
+            str(record.get("id")): position
+            for position, record in enumerate(self.data[collection])
+        }
+
     def _get_timestamp(self):
         return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -212,7 +269,9 @@ class DataManager:
         random_part = random.randint(10, 99)
         return f"{timestamp_part}-{self.id_counter}-{random_part}"
 
-    def _calculate_note_key(self, tag):
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _calculate_note_key(tag):
         value = 0
         for character in str(tag):
             value += ord(character)
@@ -237,6 +296,8 @@ class DataManager:
 
 
 class UserInterface:
+    page_size = 50
+
     @staticmethod
     def get_input(prompt):
         try:
@@ -244,6 +305,44 @@ class UserInterface:
         except (EOFError, KeyboardInterrupt):
             return ""
 
+    @staticmethod
+    def ask_range(row_count):
+        if row_count <= UserInterface.page_size:
+            return 0, row_count
+
+        answer = UserInterface.get_input("Ab Nr. (Enter=1, -N=letzte N): ").strip()
+        try:
+            start = int(answer)
+        except ValueError:
+            start = 1
+
+        if start < 0:
+            return max(0, row_count + start), -start
+        return max(1, start) - 1, row_count
+
+    @staticmethod
+    def render_rows(rows, format_row, offset=None, count=None):
+        if offset is None:
+            offset, count = UserInterface.ask_range(len(rows))
+        if count is None:
+            count = len(rows)
+        end = min(len(rows), offset + count)
+
+        while offset < end:
+            page_end = min(end, offset + UserInterface.page_size)
+            lines = [
+                format_row(index + 1, rows[index])
+                for index in range(offset, page_end)
+            ]
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+            offset = page_end
+
+            if offset < end:
+                answer = UserInterface.get_input(f"-- {offset}/{end} (Enter=weiter, q=Ende) -- ")
+                if answer.strip().lower() == "q":
+                    break
+
     @staticmethod
     def display_menu(title, options):
         print(f"\n{title}")
@@ -302,7 +401,7 @@ class TaskHandler:
     def __init__(self, data_manager):
         self.data_manager = data_manager
 
-    def show_tasks(self):
+    def show_tasks(self, offset=None, count=None):
         data = self.data_manager.get_data()
         tasks = data.get("tasks", [])
 
@@ -310,25 +409,28 @@ class TaskHandler:
             print("Keine Aufgaben.")
             return
 
-        for index, task in enumerate(tasks, 1):
-            status = "X" if task.get("done") else " "
-            priority = task.get("priority", 0)
-            text = task.get("text", "")
-            task_id = task.get("id", "")
-            timestamp = task.get("timestamp", "")
-
-            if priority >= 7:
-                flag = "!!!"
-            elif priority >= 4:
-                flag = "!!"
-            else:
-                flag = "!"
-
-            print(f"{index}) [{status}] {flag} pr={priority} id={task_id} :: {text} ({timestamp})")
+        UserInterface.render_rows(tasks, self._format_task, offset, count)
 
         if len(tasks) % 7 == 0:
             print("Viele Aufgaben heute...")
 
+    @staticmethod
+    def _format_task(index, task):
+        status = "X" if task.get("done") else " "
+        priority = task.get("priority", 0)
+        text = task.get("text", "")
+        task_id = task.get("id", "")
+        timestamp = task.get("timestamp", "")
+
+        if priority >= 7:
+            flag = "!!!"
+        elif priority >= 4:
+            flag = "!!"
+        else:
+            flag = "!"
+
+        return f"{index}) [{status}] {flag} pr={priority} id={task_id} :: {text} ({timestamp})"
+
     def add_task(self):
         text = UserInterface.get_input("Text: ")
         priority_input = UserInterface.get_input("Priorität 0-9: ")
@@ -365,7 +467,7 @@ class MoneyHandler:
     def __init__(self, data_manager):
         self.data_manager = data_manager
 
-    def show_transactions(self):
+    def show_transactions(self, offset=None, count=None):
         data = self.data_manager.get_data()
         transactions = data.get("transactions", [])
 
@@ -373,31 +475,34 @@ class MoneyHandler:
             print("Keine Buchungen.")
             return
 
-        for index, transaction in enumerate(transactions, 1):
-            transaction_id = transaction.get("id", "")
-            kind = transaction.get("kind", "")
-            amount = float(transaction.get("amount", 0.0))
-            note = transaction.get("note", "")
-            timestamp = transaction.get("timestamp", "")
+        UserInterface.render_rows(transactions, self._format_transaction, offset, count)
 
-            sign = "-" if amount < 0 else "+"
-            abs_amount = abs(amount)
-
-            if kind == "in":
-                label = "EIN"
-            elif kind == "out":
-                label = "AUS"
-            else:
-                label = "???"
+    @staticmethod
+    def _format_transaction(index, transaction):
+        transaction_id = transaction.get("id", "")
+        kind = transaction.get("kind", "")
+        amount = float(transaction.get("amount", 0.0))
+        note = transaction.get("note", "")
+        timestamp = transaction.get("timestamp", "")
+
+        sign = "-" if amount < 0 else "+"
+        abs_amount = abs(amount)
+
+        if kind == "in":
+            label = "EIN"
+        elif kind == "out":
+            label = "AUS"
+        else:
+            label = "???"
 
-            if abs_amount > 9999:
-                exclamation = "!!!"
-            elif abs_amount > 99:
-                exclamation = "!!"
-            else:
-                exclamation = "!"
+        if abs_amount > 9999:
+            exclamation = "!!!"
+        elif abs_amount > 99:
+            exclamation = "!!"
+        else:
+            exclamation = "!"
 
-            print(f"{index}) [{label}] id={transaction_id} {sign}{abs_amount} {exclamation} {note} ({timestamp})")
+        return f"{index}) [{label}] id={transaction_id} {sign}{abs_amount} {exclamation} {note} ({timestamp})"
 
     def add_income(self):
         amount = UserInterface.get_input("Betrag: ")
@@ -433,7 +538,7 @@ class NoteHandler:
     def __init__(self, data_manager):
         self.data_manager = data_manager
 
-    def show_notes(self):
+    def show_notes(self, offset=None, count=None):
         data = self.data_manager.get_data()
         notes = data.get("notes", [])
 
@@ -441,24 +546,27 @@ class NoteHandler:
             print("Keine Notizen.")
             return
 
-        for index, note in enumerate(notes, 1):
-            note_id = note.get("id", "")
-            tag = note.get("tag", "none")
-            text = note.get("text", "")
-            timestamp = note.get("timestamp", "")
-            key = note.get("key", 0)
+        UserInterface.render_rows(notes, self._format_note, offset, count)
 
-            parity = "EVEN" if key % 2 == 0 else "ODD"
+        if len(notes) % 4 == 0:
+            print("Runde Zahl an Notizen.")
 
-            if len(text) > 60:
-                display_text = f"{text[:60]}..."
-            else:
-                display_text = text
+    @staticmethod
+    def _format_note(index, note):
+        note_id = note.get("id", "")
+        tag = note.get("tag", "none")
+        text = note.get("text", "")
+        timestamp = note.get("timestamp", "")
+        key = note.get("key", 0)
 
-            print(f"{index}) id={note_id} [{tag}] {parity} k={key} :: {display_text} ({timestamp})")
+        parity = "EVEN" if key % 2 == 0 else "ODD"
 
-        if len(notes) % 4 == 0:
-            print("Runde Zahl an Notizen.")
+        if len(text) > 60:
+            display_text = f"{text[:60]}..."
+        else:
+            display_text = text
+
+        return f"{index}) id={note_id} [{tag}] {parity} k={key} :: {display_text} ({timestamp})"
 
     def add_note(self):
         tag = UserInterface.get_input("Tag: ")
@@ -613,6 +721,12 @@ class Application:
 
 
 def main():
+    if "--page-size" in sys.argv:
+        try:
+            UserInterface.page_size = max(1, int(sys.argv[sys.argv.index("--page-size") + 1]))
+        except (IndexError, ValueError):
+            pass
+
     app = Application()
     app.run()
 
@@ -25,12 +25,15 @@ class Logbook:
         }
         self._counter = 0
         self.cache = {}
+        self._users_by_id = {}
+        self._users_by_name = {}
 
     def load(self):
         self.state["loaded"] = True
 
         if not os.path.exists(self.filename):
             self._reset_database()
+            self._rebuild_user_indexes()
             self.state["last_operation"] = "load"
             return True
 
@@ -46,6 +49,7 @@ class Logbook:
         except (json.JSONDecodeError, IOError):
             self._reset_database()
 
+        self._rebuild_user_indexes()
         self.state["last_operation"] = "load"
         return True
 
@@ -125,6 +129,8 @@ class Logbook:
 
         user = self._create_user(name)
         self.database["users"].append(user)
+        self._users_by_id[user["id"]] = user
+        self._users_by_name[name] = user
         self.state["dirty"] = True
         self.state["last_operation"] = "add_user"
 
@@ -142,7 +148,7 @@ class Logbook:
         return name
 
     def _user_exists(self, name):
-        return any(user.get("name") == name for user in self.database["users"])
+        return name in self._users_by_name
 
     def _create_user(self, name):
         user = {
@@ -183,7 +189,10 @@ class Logbook:
             if str(user.get("id")) != identifier and str(user.get("name")) != identifier
         ]
 
-        return len(self.database["users"]) < original_count
+        removed = len(self.database["users"]) < original_count
+        if removed:
+            self._rebuild_user_indexes()
+        return removed
 
     def _remove_user_sessions(self, user_identifier):
         identifier = str(user_identifier)
@@ -342,10 +351,18 @@ class Logbook:
     def _find_user(self, identifier):
         identifier = str(identifier)
 
+        user = self._users_by_id.get(identifier)
+        if user is None:
+            user = self._users_by_name.get(identifier)
+        return user
+
+    def _rebuild_user_indexes(self):
+        self._users_by_id = {}
+        self._users_by_name = {}
+
         for user in self.database.get("users", []):
-            if str(user.get("id")) == identifier or str(user.get("name")) == identifier:
-                return user
-        return None
+            self._users_by_id.setdefault(str(user.get("id")), user)
+            self._users_by_name.setdefault(str(user.get("name")), user)
 
     def _calculate_score(self, minutes, mood, note, user):
         base_score = 0.0
@@ -15,12 +15,15 @@ class ShopSystem:
         }
         self.status = {"loaded": False, "dirty": False, "last_operation": ""}
         self.id_counter = 0
+        self._items_by_id = {}
+        self._items_by_name = {}
 
     def load(self):
         self.status["loaded"] = True
 
         if not os.path.exists(self.data_file):
             self._initialize_database()
+            self._rebuild_item_indexes()
             self.status["last_operation"] = "load"
             return True
 
@@ -37,6 +40,7 @@ class ShopSystem:
         except (json.JSONDecodeError, IOError):
             self._initialize_database()
 
+        self._rebuild_item_indexes()
         self.status["last_operation"] = "load"
         return True
 
@@ -86,6 +90,8 @@ class ShopSystem:
         item = self._create_item_object(item_id, item_name, price, stock_count)
 
         self.database["items"].append(item)
+        self._items_by_id[item_id] = item
+        self._items_by_name.setdefault(item_name, item)
         self.status["dirty"] = True
         self.status["last_operation"] = "add_item"
         return item_id
@@ -140,6 +146,7 @@ class ShopSystem:
         item_removed = len(self.database["items"]) < original_count
 
         if item_removed:
+            self._rebuild_item_indexes()
             self._mark_cart_items_as_dead(item_identifier)
             self.status["dirty"] = True
 
@@ -177,10 +184,19 @@ class ShopSystem:
 
     def _find_item(self, item_identifier):
         identifier = str(item_identifier)
+
+        item = self._items_by_id.get(identifier)
+        if item is None:
+            item = self._items_by_name.get(identifier)
+        return item
+
+    def _rebuild_item_indexes(self):
+        self._items_by_id = {}
+        self._items_by_name = {}
+
         for item in self.database["items"]:
-            if str(item["id"]) == identifier or str(item["name"]) == identifier:
-                return item
-        return None
+            self._items_by_id.setdefault(str(item["id"]), item)
+            self._items_by_name.setdefault(str(item["name"]), item)
 
     def _sanitize_quantity(self, quantity):
         try: